@@ -1,130 +1,794 @@
 import chess as ch
+import concurrent.futures
+import math
+import multiprocessing
 import random as rd
+import threading
+import time
+from transposition_table import TranspositionTable, position_key, EXACT, LOWER, UPPER
+from move_ordering import HeuristicMoveOrderer, MAX_PLY, static_exchange
+from evaluation import Evaluator, PIECE_VALUES
+from search_stats import SearchStats
+from opening_book import OpeningBook
+from tablebase import Tablebase
+from position import Position
+
+# Deepest iteration when searching on a time budget
+MAX_DEPTH = 20
+
+# Scores are in centipawns from the engine's point of view. Being mated
+# scores -(MATE_SCORE - ply), ply counted from the root, so shorter mates
+# score higher.
+MATE_SCORE = 99900
+MOBILITY_BONUS = 3  # per legal move during the opening
+# Random tie-break added to leaf evaluations (0 to this many centipawns) so
+# that games vary when no opening book picks the first moves
+EVAL_JITTER = 2
+# Tablebase wins score below any mate but above any material balance
+TB_WIN_SCORE = 20000
+
+# Quiescence search skips captures that can't lift the score within this margin of alpha
+DELTA_MARGIN = 200
+
+# Selective search (see Engine.engine)
+NULL_MOVE_REDUCTION = 2  # plies saved by the null move search (one more when deep)
+NULL_MOVE_MIN_DEPTH = 3
+LMR_MIN_MOVES = 3  # quiet moves searched before reductions start
+LMR_MIN_DEPTH = 3
+# Reduction for (remaining depth, move index), growing with the log of both
+LMR_REDUCTIONS = [[max(1, int(0.75 + math.log(depth) * math.log(index) / 2.25)) if depth and index else 0
+                   for index in range(64)] for depth in range(MAX_PLY)]
+FUTILITY_DEPTH = 2  # (reverse) futility pruning this close to the leaves
+FUTILITY_MARGIN = 150  # per ply of remaining depth
+
+# Half-width of the first aspiration window around the previous iteration's
+# score; it grows by ASPIRATION_GROWTH each time the score falls outside
+ASPIRATION_WINDOW = 50
+ASPIRATION_GROWTH = 4
+ASPIRATION_MAX = 1000  # wider than this: search with an open window
+
+# How many nodes are searched between two clock/stop checks
+TIME_CHECK_INTERVAL = 256
+
+# Branching factor used to estimate the nodes saved by a tablebase cutoff
+# before two iterations have been measured
+DEFAULT_BRANCHING_FACTOR = 3.0
+
+
+class SearchTimeout(Exception):
+    """Raised inside the search when the time budget is used up or it is stopped"""
+
+
+# Stop flag and ponder hit event shared by the search processes of a parallel engine
+_processStopEvent = None
+_processPonderHit = None
+
+
+def mateIn(score):
+    """Moves until mate of a mate score (negative when the engine is mated), None for other scores"""
+    if score is None or abs(score) < MATE_SCORE - MAX_PLY:
+        return None
+    moves = (MATE_SCORE - abs(score) + 1) // 2
+    return moves if score > 0 else -moves
+
+
+def _toTableScore(score, ply):
+    # Mate and tablebase scores count plies from the root; the table keeps
+    # them from the stored node, so they stay right at any other ply
+    if score >= TB_WIN_SCORE - MAX_PLY:
+        return score + ply
+    if score <= -TB_WIN_SCORE + MAX_PLY:
+        return score - ply
+    return score
+
+
+def _fromTableScore(score, ply):
+    if score >= TB_WIN_SCORE - MAX_PLY:
+        return score - ply
+    if score <= -TB_WIN_SCORE + MAX_PLY:
+        return score + ply
+    return score
+
+
+def _initSearchProcess(stopEvent, ponderHit):
+    global _processStopEvent, _processPonderHit
+    _processStopEvent = stopEvent
+    _processPonderHit = ponderHit
+
+
+def _searchRootMoves(board, color, maxDepth, timeLimit, options, rootMoves, ponder):
+    """Search a subset of the root moves in a worker process"""
+    engine = Engine(board, maxDepth, color, timeLimit=timeLimit, **options)
+    engine.rootMoves = rootMoves
+    engine.getBestMove(stopEvent=_processStopEvent, ponderHit=_processPonderHit if ponder else None)
+    return engine.stats
+
 
 class Engine:
 
-    def __init__(self, board, maxDepth, color):
+    def __init__(self, board, maxDepth, color, ttSize=1 << 18, timeLimit=None, orderer=None,
+                 quiescence=True, quiescenceChecks=False, workers=1, onIteration=None, bookPath=None,
+                 tablebasePath=None, nullMove=True, lmr=True, futility=True, jitter=None):
         self.board = board
         self.color = color
+        # Maximum search depth in plies
         self.maxDepth = maxDepth
+        # Time budget per move in milliseconds (None = always search to maxDepth)
+        self.timeLimit = timeLimit
+        # Transposition table (ttSize = maximum number of stored positions)
+        self.tt = TranspositionTable(ttSize)
+        # Move ordering (pass move_ordering.MoveOrderer() to search without heuristics)
+        self.orderer = orderer if orderer is not None else HeuristicMoveOrderer()
+        # Running material/piece-square evaluation
+        self.evaluator = Evaluator()
+        # Resolve captures (and optionally checks) past the nominal depth
+        self.quiescence = quiescence
+        self.quiescenceChecks = quiescenceChecks
+        # Selective search: null move pruning, late move reductions and
+        # (reverse) futility pruning, each switchable for comparisons
+        self.nullMove = nullMove
+        self.lmr = lmr
+        self.futility = futility
+        # Number of processes sharing the root moves (1 = search in this thread)
+        self.workers = workers
+        self.pool = None
+        self.poolStopEvent = None
+        self.poolPonderHit = None
+        # Called with Engine.iterationInfo() after every completed iteration
+        self.onIteration = onIteration
+        # Polyglot opening book consulted before searching
+        self.book = OpeningBook(bookPath) if bookPath is not None else None
+        # Random tie-break of the evaluation in centipawns: EVAL_JITTER by
+        # default, none when the book already varies the games (0 = deterministic)
+        if jitter is None:
+            jitter = EVAL_JITTER if self.book is None else 0
+        self.jitter = jitter
+        # Syzygy tablebase directory probed at the root and inside the search
+        self.tablebase = Tablebase(tablebasePath) if tablebasePath is not None else None
+        # Lean copy of the board the search runs on (see position.Position)
+        self.position = None
+
+        # Iterative deepening state
+        self.searchDepth = maxDepth
+        self.completedDepth = 0
+        self.rootBestMove = None
+        self.rootMoves = None  # restrict the root to these moves (parallel search)
+        self.bestScore = None
+        self.deadline = None
+        self.startTime = None
+        self.searchTimeLimit = None
+        self.ponderHit = None
+        self.pondering = False
+        self.branchingFactor = DEFAULT_BRANCHING_FACTOR
+        # Statistics of the current/last search
+        self.stats = SearchStats()
+        self.stopEvent = threading.Event()
+
+    def getBestMove(self, timeLimit=None, stopEvent=None, ponderHit=None):
+        """Iterative deepening: search depth 1, 2, 3... up to maxDepth.
+
+        With a time budget (milliseconds, defaults to self.timeLimit) the move
+        of the deepest fully completed iteration is returned once time runs out.
+        The search can also be ended early from another thread with stop() or
+        by setting stopEvent.
+
+        Passing a ponderHit event starts a ponder search: the clock only runs
+        once the event is set (the opponent played the expected move), and the
+        time spent pondering counts towards the budget, so a long ponder
+        answers right away.
+        """
+        if timeLimit is None:
+            timeLimit = self.timeLimit
+        self.stopEvent = stopEvent if stopEvent is not None else threading.Event()
+        self.ponderHit = ponderHit
+        self.pondering = ponderHit is not None and not ponderHit.is_set()
+        self.searchTimeLimit = timeLimit
+
+        # The transposition table and move ordering history are kept from the
+        # previous moves; only the counters start over
+        self.tt.reset_stats()
+        self.orderer.age()
+        # The search runs on a Position built from the board (the board itself is not changed)
+        self.position = Position(self.board)
+        self.evaluator.reset(self.position)
+        self.stats.reset()
+        self.completedDepth = 0
+        self.rootBestMove = None
+        self.bestScore = None
+        self.branchingFactor = DEFAULT_BRANCHING_FACTOR
+        if self.tablebase is not None:
+            self.tablebase.reset_stats()
+
+        start = self.startTime = time.perf_counter()
+        self.deadline = start + timeLimit / 1000 if timeLimit is not None and not self.pondering else None
+
+        # Play from the opening book while the position is in it
+        if self.book is not None and self.rootMoves is None:
+            bookMove = self.book.choose_move(self.board)
+            if bookMove is not None:
+                self.stats.bookMove = True
+                self.deadline = None
+                return bookMove
+
+        # Perfect play once few enough pieces are left
+        if self.tablebase is not None and self.rootMoves is None:
+            tablebaseMove, wdl = self.tablebase.best_move(self.board)
+            if tablebaseMove is not None:
+                self.stats.tablebaseMove = True
+                self.bestScore = self.tablebaseScore(wdl, self.board.turn, 1)
+                self.deadline = None
+                return tablebaseMove
+
+        # Nothing to think about with a single legal move
+        if (self.deadline is not None and self.rootMoves is None
+                and self.board.legal_moves.count() == 1):
+            return next(iter(self.board.legal_moves))
+
+        if self.workers > 1:
+            bestMove = self.parallelSearch(timeLimit)
+            self.deadline = None
+            self.stats.elapsed = time.perf_counter() - start
+            return bestMove
+
+        bestMove = None
+        for depth in range(1, self.maxDepth + 1):
+            self.searchDepth = depth
+            iterationStart = time.perf_counter()
+            previousScore = self.bestScore
+            try:
+                result = self.aspirationSearch()
+            except SearchTimeout:
+                # Undo the moves of the interrupted iteration
+                while self.position.move_stack:
+                    self.unmakeMove()
+                # A failed aspiration search may have overwritten the score
+                self.bestScore = previousScore
+                break
+
+            bestMove = result
+            self.completedDepth = depth
+            if not isinstance(result, ch.Move):
+                # No legal moves at the root: return the evaluation as before
+                break
+            # The best move of this iteration is searched first in the next one
+            self.rootBestMove = result
+            self.finishIteration(iterationStart)
+
+            if self.stopEvent.is_set():
+                break
+            self.checkPonderHit()
+            if self.pondering:
+                continue
+            # Stop early when the next (longer) iteration can't finish in time
+            if (self.deadline is not None
+                    and time.perf_counter() - start >= (self.deadline - start) / 2):
+                break
+
+        self.deadline = None
+        self.stats.elapsed = time.perf_counter() - start
+        self.stats.ttProbes, self.stats.ttHits = self.tt.hits + self.tt.misses, self.tt.hits
+        return bestMove
+
+    def aspirationSearch(self):
+        """Search the root with a window around the previous iteration's score.
+
+        Most iterations end close to the previous score, and the narrow window
+        prunes more. When the score falls outside, the window is widened on
+        that side and the root searched again.
+        """
+        inf = float("inf")
+        previous = self.bestScore
+        if previous is None or abs(previous) >= TB_WIN_SCORE - MAX_PLY:
+            # First iteration, or a mate/tablebase score: no useful estimate
+            return self.engine(-inf, inf, 1, self.searchDepth)
+
+        # Window from the side to move at the root
+        sign = 1 if self.position.turn == self.color else -1
+        previous *= sign
+        lower = upper = ASPIRATION_WINDOW
+        while True:
+            alpha = previous - lower if lower <= ASPIRATION_MAX else -inf
+            beta = previous + upper if upper <= ASPIRATION_MAX else inf
+            result = self.engine(alpha, beta, 1, self.searchDepth)
+            if not isinstance(result, ch.Move):
+                return result
+            score = sign * self.bestScore
+            if score <= alpha:
+                lower *= ASPIRATION_GROWTH
+            elif score >= beta:
+                upper *= ASPIRATION_GROWTH
+            else:
+                return result
+            self.stats.aspirationResearches += 1
+
+    def finishIteration(self, iterationStart):
+        """Record a completed iteration and report it to the onIteration callback"""
+        now = time.perf_counter()
+        stats = self.stats
+        stats.ttProbes, stats.ttHits = self.tt.hits + self.tt.misses, self.tt.hits
+        stats.pv = self.principalVariation()
+        elapsed = now - self.startTime
+        if stats.iterations:
+            # Nodes of this iteration over the previous one's (iteration node counts are cumulative)
+            last = stats.iterations[-1]['nodes']
+            previous = last - (stats.iterations[-2]['nodes'] if len(stats.iterations) > 1 else 0)
+            if previous > 0:
+                self.branchingFactor = max(1.0, (stats.nodes - last) / previous)
+        stats.iterations.append({
+            'depth': self.searchDepth,
+            'selDepth': stats.selDepth,
+            'move': self.rootBestMove,
+            'score': self.bestScore,
+            'nodes': stats.nodes,
+            'time': elapsed,
+            'iterationTime': now - iterationStart,
+            'nps': round(stats.nodes / elapsed) if elapsed > 0 else 0,
+            'pv': stats.pv,
+        })
+        if self.onIteration is not None:
+            self.onIteration(stats.iterations[-1])
+
+    def newGame(self):
+        """Forget the transposition table and move ordering history of the previous game"""
+        self.tt.clear()
+        self.orderer.clear()
+
+    def ponderMove(self):
+        """The opponent's reply expected by the last search (second move of its PV), or None"""
+        return self.stats.pv[1] if len(self.stats.pv) > 1 else None
+
+    def iterationInfo(self):
+        """The last completed iteration: depth, selDepth, move, score, nodes, time, nps and pv"""
+        return self.stats.iterations[-1] if self.stats.iterations else None
+
+    def principalVariation(self):
+        """Follow the best moves stored in the transposition table from the root"""
+        pv = [self.rootBestMove]
+        board = self.board.copy(stack=False)
+        board.push(self.rootBestMove)
+        seen = {position_key(self.board)}
+        while len(pv) < self.searchDepth:
+            key = position_key(board)
+            entry = self.tt.peek(key)
+            if key in seen or entry is None or entry[4] is None or not board.is_legal(entry[4]):
+                break
+            seen.add(key)
+            pv.append(entry[4])
+            board.push(entry[4])
+        return pv
+
+    def parallelSearch(self, timeLimit):
+        """Split the root moves between worker processes and merge their results.
+
+        Every process runs its own iterative deepening over its share of the
+        root moves; the move played is the best one at the deepest iteration
+        that all processes completed. A ponder search's clock starts in the
+        processes when ponderHit is set here.
+
+        Each process searches with a new Engine, so its transposition table
+        starts empty on every move and the killers and history it learns
+        are lost when it returns: the search state kept between moves only
+        helps a single-process engine.
+        """
+        rootMoves = self.orderer.order_moves(self.board, list(self.board.legal_moves), 0)
+        if not rootMoves:
+            return self.mateOpportunity()
+
+        if self.pool is None:
+            self.poolStopEvent = multiprocessing.Event()
+            self.poolPonderHit = multiprocessing.Event()
+            self.pool = concurrent.futures.ProcessPoolExecutor(
+                self.workers, initializer=_initSearchProcess,
+                initargs=(self.poolStopEvent, self.poolPonderHit))
+        self.poolStopEvent.clear()
+        self.poolPonderHit.clear()
+
+        # Deal the ordered moves round-robin so every process gets good candidates
+        options = {
+            'ttSize': self.tt.max_entries,
+            'orderer': self.orderer,
+            'quiescence': self.quiescence,
+            'quiescenceChecks': self.quiescenceChecks,
+            'nullMove': self.nullMove,
+            'lmr': self.lmr,
+            'futility': self.futility,
+            'tablebasePath': self.tablebase.directory if self.tablebase is not None else None,
+            'jitter': self.jitter,
+        }
+        shares = [rootMoves[i::self.workers] for i in range(min(self.workers, len(rootMoves)))]
+        futures = [self.pool.submit(_searchRootMoves, self.board, self.color, self.maxDepth,
+                                    timeLimit, options, share, self.pondering)
+                   for share in shares]
+
+        # Forward a stop request or ponder hit from this thread to the processes
+        pending = set(futures)
+        while pending:
+            done, pending = concurrent.futures.wait(pending, timeout=0.05)
+            if self.stopEvent.is_set():
+                self.poolStopEvent.set()
+            if self.pondering and self.ponderHit.is_set():
+                self.pondering = False
+                self.poolPonderHit.set()
 
-    def getBestMove(self):
-        return self.engine(None, 1)
+        results = [future.result() for future in futures]
+        for workerStats in results:
+            self.stats.merge(workerStats)
+
+        # Merge at the deepest iteration every process has completed
+        self.completedDepth = min(len(workerStats.iterations) for workerStats in results)
+        for depth in range(1, self.completedDepth + 1):
+            candidates = [workerStats.iterations[depth - 1] for workerStats in results]
+            best = dict(max(candidates, key=lambda info: info['score']))
+            best['nodes'] = sum(info['nodes'] for info in candidates)
+            best['time'] = max(info['time'] for info in candidates)
+            best['nps'] = round(best['nodes'] / best['time']) if best['time'] > 0 else 0
+            self.stats.iterations.append(best)
+            if self.onIteration is not None:
+                self.onIteration(best)
+        best = self.stats.iterations[-1]
+        self.rootBestMove, self.bestScore, self.stats.pv = best['move'], best['score'], best['pv']
+        return self.rootBestMove
+
+    def close(self):
+        """Shut down the worker processes of a parallel engine, close the book and tablebases"""
+        if self.pool is not None:
+            self.pool.shutdown()
+            self.pool = None
+        if self.book is not None:
+            self.book.close()
+            self.book = None
+        if self.tablebase is not None:
+            self.tablebase.close()
+            self.tablebase = None
+
+    def searchStats(self):
+        """Statistics of the last getBestMove() call as a dict (see self.stats)"""
+        stats = self.stats.as_dict()
+        stats['depth'] = self.completedDepth
+        stats['tt'] = self.tt.stats()
+        if self.tablebase is not None:
+            stats['tablebase'] = self.tablebase.stats()
+        return stats
+
+    def stop(self):
+        """Ask the running search to return as soon as possible (thread-safe)"""
+        self.stopEvent.set()
+
+    def checkPonderHit(self):
+        # The expected move was played: start the clock from the start of the ponder search
+        if self.pondering and self.ponderHit.is_set():
+            self.pondering = False
+            if self.searchTimeLimit is not None:
+                self.deadline = self.startTime + self.searchTimeLimit / 1000
+
+    def checkTime(self):
+        self.checkPonderHit()
+        # Never interrupt the first iteration, we need at least one move
+        if self.completedDepth == 0:
+            return
+        if (self.stopEvent.is_set()
+                or (self.deadline is not None and time.perf_counter() >= self.deadline)):
+            raise SearchTimeout()
 
     def evalFunct(self):
-        compt = 0
-        # Sums up the material values
-        for i in range(64):
-            compt += self.squareResPoints(ch.SQUARES[i])
-        compt += self.mateOpportunity() + self.openning() + 0.001 * rd.random()
+        self.stats.leafEvals += 1
+        # Material and piece-square score, kept up to date move by move
+        compt = self.evaluator.score if self.color == ch.WHITE else -self.evaluator.score
+
+        # Generate the legal moves once: the count is only needed for the
+        # opening mobility bonus, otherwise finding a single move is enough
+        if self.position.fullmove_number < 10:
+            moveCount = self.position.legal_move_count()
+        else:
+            moveCount = 1 if any(self.position.generate_legal_moves()) else 0
+        if moveCount == 0:
+            return self.mateOpportunity()
+
+        compt += self.openning(moveCount)
+        if self.jitter:
+            compt += int(rd.random() * (self.jitter + 1))
         return compt
 
+    # Score of a position without legal moves, mates closer to the root scoring higher
     def mateOpportunity(self):
-        if (self.board.legal_moves.count() == 0):
-            if (self.board.turn == self.color):
-                return -999
-            else:
-                return 999
-        else:
+        if not self.position.is_check():
+            # Stalemate is a draw
             return 0
+        ply = len(self.position.move_stack)
+        if (self.position.turn == self.color):
+            return -MATE_SCORE + ply
+        else:
+            return MATE_SCORE - ply
+
+    def tablebaseScore(self, wdl, turn, depth):
+        """Engine-relative score of a tablebase WDL for the side to move (turn).
+
+        Cursed wins and blessed losses are draws under the 50-move rule; wins
+        found closer to the root score higher.
+        """
+        if wdl > 1:
+            score = TB_WIN_SCORE - depth
+        elif wdl < -1:
+            score = -TB_WIN_SCORE + depth
+        else:
+            score = 0
+        return score if turn == self.color else -score
 
     # to make the engine develop in the first moves
-    def openning(self):
-        if (self.board.fullmove_number < 10):
-            if (self.board.turn == self.color):
-                return 1 / 30 * self.board.legal_moves.count()
+    def openning(self, moveCount):
+        if (self.position.fullmove_number < 10):
+            if (self.position.turn == self.color):
+                return MOBILITY_BONUS * moveCount
             else:
-                return -1 / 30 * self.board.legal_moves.count()
+                return -MOBILITY_BONUS * moveCount
         else:
             return 0
 
-    # Takes a square as input and returns the corresponding value of its resident
-    def squareResPoints(self, square):
-        pieceValue = 0
-        if (self.board.piece_type_at(square) == ch.PAWN):
-            pieceValue = 1
-        elif (self.board.piece_type_at(square) == ch.ROOK):
-            pieceValue = 5
-        elif (self.board.piece_type_at(square) == ch.BISHOP):
-            pieceValue = 3.1
-        elif (self.board.piece_type_at(square) == ch.KNIGHT):
-            pieceValue = 3
-        elif (self.board.piece_type_at(square) == ch.QUEEN):
-            pieceValue = 9
-
-        if (self.board.color_at(square) != self.color):
-            return -pieceValue
+    def makeMove(self, move):
+        # Update the running evaluation before the board changes
+        self.evaluator.push(self.position, move)
+        self.position.push(move)
+
+    def unmakeMove(self):
+        self.position.pop()
+        self.evaluator.pop()
+
+    def engine(self, alpha, beta, depth, remaining):
+        """Negamax principal variation search.
+
+        depth is the ply from the root plus one, remaining the depth left to
+        search (smaller than searchDepth + 1 - depth along reduced lines).
+        Scores are from the point of view of the side to move. The first move
+        of a node is searched with the full (alpha, beta) window, the others
+        with a null window around alpha that only proves them worse; a move
+        that fails high is searched again with the full window. At the root
+        (depth 1) the best move is returned and its score kept in bestScore.
+        """
+        stats = self.stats
+        stats.nodes += 1
+        if stats.nodes % TIME_CHECK_INTERVAL == 0:
+            self.checkTime()
+        sign = 1 if self.position.turn == self.color else -1
+
+        # reached depth of the current iteration: resolve captures, then evaluate
+        if remaining <= 0:
+            if self.quiescence:
+                return self.quiesce(alpha, beta, 0)
+            if depth - 1 > stats.selDepth:
+                stats.selDepth = depth - 1
+            return sign * self.evalFunct()
+
+        alphaOrig = alpha
+        pvNode = beta - alpha > 1
+
+        # Look the position up in the transposition table
+        key = self.position.key
+        entry = self.tt.probe(key)
+        ttMove = None
+        if entry is not None:
+            ttMove = entry[4]
+            # Stored result is usable if it was searched at least as deep
+            # (never at the root, where we need a move rather than a score)
+            if depth > 1 and entry[1] >= remaining:
+                ttScore, ttBound = _fromTableScore(entry[2], depth - 1), entry[3]
+                if ttBound == EXACT:
+                    return ttScore
+                if ttBound == LOWER:
+                    alpha = max(alpha, ttScore)
+                elif ttBound == UPPER:
+                    beta = min(beta, ttScore)
+                if alpha >= beta:
+                    return ttScore
+
+        # Few pieces left: the tablebase knows the result of the subtree. WDL
+        # assumes the 50-move counter was just reset, so only probe right
+        # after a capture or pawn move: later a win may be drawn by the rule
+        if (depth > 1 and self.tablebase is not None and self.position.halfmove_clock == 0
+                and self.tablebase.covers(self.position)):
+            wdl = self.tablebase.probe_wdl(self.position)
+            if wdl is not None:
+                stats.tbHits += 1
+                stats.tbNodesSaved += round(self.branchingFactor ** remaining)
+                return sign * self.tablebaseScore(wdl, self.position.turn, depth)
+
+        inCheck = self.position.is_check()
+
+        # Selective pruning, never at the root, in PV nodes, in check or
+        # when the window is about mate or tablebase scores
+        futile = False
+        if depth > 1 and not pvNode and not inCheck and abs(beta) < TB_WIN_SCORE - MAX_PLY:
+            # Material and piece-square score for the side to move
+            staticEval = self.evaluator.score if self.position.turn == ch.WHITE else -self.evaluator.score
+
+            # Reverse futility: so far above beta that the opponent can't catch up
+            if (self.futility and remaining <= FUTILITY_DEPTH
+                    and staticEval - FUTILITY_MARGIN * remaining >= beta):
+                stats.reverseFutilityPrunes += 1
+                return staticEval - FUTILITY_MARGIN * remaining
+
+            # Null move: if passing still fails high, a real move will too.
+            # Not right after another null move, and not with only king and
+            # pawns, where zugzwang makes passing the best "move".
+            if (self.nullMove and remaining >= NULL_MOVE_MIN_DEPTH and staticEval >= beta
+                    and self.position.move_stack and self.position.move_stack[-1]
+                    and self.position.occupied_co[self.position.turn] & ~(self.position.pawns | self.position.kings)):
+                reduction = NULL_MOVE_REDUCTION + (1 if remaining > 6 else 0)
+                self.makeMove(ch.Move.null())
+                value = -self.engine(-beta, -beta + 1, depth + 1, remaining - 1 - reduction)
+                self.unmakeMove()
+                if value >= beta:
+                    stats.nullMoveCutoffs += 1
+                    # Don't trust mate scores found after passing
+                    return beta if value >= TB_WIN_SCORE - MAX_PLY else value
+
+            # Futility: near the leaves quiet moves can't lift the score to alpha
+            futile = (self.futility and remaining <= FUTILITY_DEPTH
+                      and staticEval + FUTILITY_MARGIN * remaining <= alpha)
+
+        # Generate the moves of the current position once. Outside of check
+        # pseudo-legal moves are cheaper; the few that leave the king in
+        # check are skipped after being played.
+        if inCheck:
+            moveListe = list(self.position.generate_legal_moves())
         else:
-            return pieceValue
+            moveListe = list(self.position.generate_pseudo_legal_moves())
+
+        if depth == 1:
+            # Parallel search: this process only searches part of the root moves
+            if self.rootMoves is not None:
+                moveListe = [move for move in moveListe if move in self.rootMoves]
+            # At the root, start with the best move of the previous iteration
+            if self.rootBestMove is not None:
+                ttMove = self.rootBestMove
+
+        # Search the best move from the table first, then the most promising ones
+        moveListe = self.orderer.order_moves(self.position, moveListe, depth - 1, ttMove)
+
+        best_move = None
+        bestValue = float("-inf")
+        legalMoves = 0
+
+        for i in moveListe:
+            quiet = not i.promotion and not self.position.is_capture(i)
+
+            # Play move i
+            self.makeMove(i)
+            if not inCheck and self.position.was_into_check():
+                # Illegal: the move leaves our king in check
+                self.unmakeMove()
+                continue
+            moveIndex = legalMoves
+            legalMoves += 1
+            quiet = quiet and not self.position.is_check()
+
+            if futile and quiet and moveIndex > 0:
+                stats.futilityPrunes += 1
+                self.unmakeMove()
+                continue
+
+            if moveIndex == 0:
+                # Expected best move: full window
+                value = -self.engine(-beta, -alpha, depth + 1, remaining - 1)
+            else:
+                # Late quiet moves are searched less deep first
+                reduction = 0
+                if (self.lmr and quiet and not inCheck and not pvNode and moveIndex >= LMR_MIN_MOVES
+                        and remaining >= LMR_MIN_DEPTH):
+                    reduction = min(LMR_REDUCTIONS[min(remaining, MAX_PLY - 1)][min(moveIndex, 63)], remaining - 1)
+                    stats.lmrReductions += 1
+
+                # Scout: prove the move is no better than alpha
+                value = -self.engine(-alpha - 1, -alpha, depth + 1, remaining - 1 - reduction)
+                if reduction and value > alpha:
+                    # The reduced search was too optimistic to trust: full depth
+                    stats.lmrResearches += 1
+                    value = -self.engine(-alpha - 1, -alpha, depth + 1, remaining - 1)
+                if alpha < value < beta:
+                    # It is better after all: search it again for its exact score
+                    value = -self.engine(-beta, -alpha, depth + 1, remaining - 1)
+
+            # Undo move i
+            self.unmakeMove()
 
-    def engine(self, candidate, depth):
+            if value > bestValue:
+                best_move = i
+                bestValue = value
+                if value > alpha:
+                    alpha = value
 
-        # reached max depth of search or no possible moves
-        if (depth == self.maxDepth
-                or self.board.legal_moves.count() == 0):
-            return self.evalFunct()
+            # Beta cutoff: the opponent won't allow this line
+            if alpha >= beta:
+                self.recordCutoff(i, moveIndex, depth, remaining)
+                break
 
+        # No legal moves: checkmate or stalemate (the root returns the
+        # engine's score instead of a move, as before)
+        if legalMoves == 0:
+            return self.mateOpportunity() if depth == 1 else sign * self.mateOpportunity()
+
+        # Remember the result for transpositions of this position
+        if bestValue <= alphaOrig:
+            bound = UPPER
+        elif bestValue >= beta:
+            bound = LOWER
         else:
-            # get list of legal moves of the current position
-            moveListe = list(self.board.legal_moves)
+            bound = EXACT
+        self.tt.store(key, remaining, _toTableScore(bestValue, depth - 1), bound, best_move)
+
+        if depth > 1:
+            return bestValue
+        # At the root return the move, its score is kept from the engine's side
+        self.bestScore = sign * bestValue
+        return best_move
+
+    def quiesce(self, alpha, beta, qDepth):
+        """Search captures (and optionally checks) past the horizon until the position is quiet"""
+        stats = self.stats
+        stats.nodes += 1
+        stats.qNodes += 1
+        if stats.nodes % TIME_CHECK_INTERVAL == 0:
+            self.checkTime()
+        ply = len(self.position.move_stack)
+        if ply > stats.selDepth:
+            stats.selDepth = ply
 
-            # If no moves available, return evaluation
+        sign = 1 if self.position.turn == self.color else -1
+        inCheck = self.position.is_check()
+
+        if inCheck:
+            # No standing pat in check: every evasion has to be tried
+            moveListe = list(self.position.generate_legal_moves())
             if not moveListe:
-                return self.evalFunct()
-
-            # initialise newCandidate and best move
-            newCandidate = None
-            best_move = moveListe[0]  # Initialize with first move as fallback
-            
-            # (uneven depth means engine's turn)
-            if (depth % 2 != 0):
-                newCandidate = float("-inf")
-            else:
-                newCandidate = float("inf")
-
-            # analyse board after deeper moves
-            for i in moveListe:
-
-                # Play move i
-                self.board.push(i)
-
-                # Get value of move i (by exploring the repercussions)
-                value = self.engine(newCandidate, depth + 1)
-
-                # Basic minmax algorithm:
-                # if maximizing (engine's turn)
-                if (value > newCandidate and depth % 2 != 0):
-                    # need to save move played by the engine
-                    if (depth == 1):
-                        best_move = i
-                    newCandidate = value
-                # if minimizing (human player's turn)
-                elif (value < newCandidate and depth % 2 == 0):
-                    newCandidate = value
-
-                # Alpha-beta pruning cuts:
-                # (if previous move was made by the engine)
-                if (candidate != None
-                        and value < candidate
-                        and depth % 2 == 0):
-                    self.board.pop()
-                    break
-                # (if previous move was made by the human player)
-                elif (candidate != None
-                      and value > candidate
-                      and depth % 2 != 0):
-                    self.board.pop()
-                    break
-
-                # Undo last move
-                self.board.pop()
-
-            # Return result
-            if (depth > 1):
-                # return value of a move in the tree
-                return newCandidate
-            else:
-                # return the move (only on first move)
-                return best_move
+                return sign * self.mateOpportunity()
+            standPat = None
+            bestValue = float("-inf")
+        else:
+            # Stand pat: the side to move may decline all captures
+            standPat = sign * self.evalFunct()
+            if standPat >= beta:
+                return standPat
+            alpha = max(alpha, standPat)
+            bestValue = standPat
+
+            moveListe = list(self.position.generate_pseudo_legal_captures())
+            # Quiet queen promotions change the material balance as much as captures
+            promotionSquares = (ch.BB_RANK_1 | ch.BB_RANK_8) & ~self.position.occupied
+            moveListe += [move for move in self.position.generate_pseudo_legal_moves(self.position.pawns, promotionSquares)
+                          if move.promotion == ch.QUEEN]
+            if self.quiescenceChecks and qDepth == 0:
+                moveListe += [move for move in self.position.generate_pseudo_legal_moves(to_mask=~self.position.occupied)
+                              if not move.promotion and self.position.gives_check(move)]
+
+        # MVV-LVA order (no killer moves past the horizon)
+        moveListe = self.orderer.order_moves(self.position, moveListe, MAX_PLY)
+
+        for move in moveListe:
+            if standPat is not None and (self.position.is_capture(move) or move.promotion):
+                # Delta pruning: even winning the piece can't reach the window
+                gain = (PIECE_VALUES[self.position.piece_type_at(move.to_square) or ch.PAWN]
+                        + (PIECE_VALUES[move.promotion] - PIECE_VALUES[ch.PAWN] if move.promotion else 0))
+                if standPat + gain + DELTA_MARGIN <= alpha:
+                    continue
+                # Skip captures that lose material in the exchange
+                if static_exchange(self.position, move) < 0:
+                    continue
+
+            self.makeMove(move)
+            if not inCheck and self.position.was_into_check():
+                self.unmakeMove()
+                continue
+            value = -self.quiesce(-beta, -alpha, qDepth + 1)
+            self.unmakeMove()
+
+            if value > bestValue:
+                bestValue = value
+                if value > alpha:
+                    alpha = value
+            if alpha >= beta:
+                break
 
+        return bestValue
 
+    def recordCutoff(self, move, moveIndex, depth, remaining):
+        self.stats.recordCutoff(moveIndex)
+        self.orderer.record_cutoff(self.position, move, depth - 1, remaining)
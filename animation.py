@@ -0,0 +1,106 @@
+import time
+
+# Frames per second all animations are drawn at, from one shared timer
+FRAME_RATE = 60
+
+
+def ease_in_out(t):
+    """Smooth start and stop (smoothstep) for a progress t between 0 and 1"""
+    return t * t * (3 - 2 * t)
+
+
+class Animation:
+    """One running animation; see Animator.add()"""
+
+    __slots__ = ('start', 'duration', 'update', 'done', 'ease')
+
+    def __init__(self, start, duration, update, done, ease):
+        self.start = start
+        self.duration = duration
+        self.update = update
+        self.done = done
+        self.ease = ease
+
+
+class Animator:
+    """Drives every canvas animation from a single Tk timer.
+
+    Each animation is a function of its progress, computed from the time
+    elapsed since it started rather than from a frame count: when the event
+    loop is busy (the engine thread holds the interpreter, the X server is
+    slow) frames are dropped and the animation still ends on time instead
+    of being stretched. Any number of animations can run at once, and an
+    animation added with a delay waits its turn. The timer only runs while
+    something is animating.
+    """
+
+    def __init__(self, root, frame_rate=FRAME_RATE):
+        self.root = root
+        self.interval = 1 / frame_rate
+        self.animations = []
+        self.frames = 0  # frames drawn
+        self.dropped = 0  # frames skipped because the timer fired late
+        self._timer = None
+        self._last_frame = None
+
+    @property
+    def busy(self):
+        return bool(self.animations)
+
+    def add(self, duration, update, done=None, delay=0.0, ease=ease_in_out):
+        """Start an animation lasting duration seconds, after delay seconds.
+
+        update(t) is called on every frame with the eased progress t from 0
+        to 1 (always ending with exactly 1), then done() once.
+        """
+        animation = Animation(time.perf_counter() + delay, duration, update, done, ease)
+        self.animations.append(animation)
+        update(0.0)
+        if self._timer is None:
+            self._schedule(time.perf_counter())
+        return animation
+
+    def finish_all(self):
+        """Jump every animation to its end, running the done callbacks"""
+        animations, self.animations = self.animations, []
+        if self._timer is not None:
+            self.root.after_cancel(self._timer)
+            self._timer = None
+        self._last_frame = None
+        for animation in animations:
+            animation.update(1.0)
+        for animation in animations:
+            if animation.done is not None:
+                animation.done()
+
+    def _schedule(self, frame_start):
+        # Next frame one interval after this one started, whatever drawing it took
+        delay = max(1, int((frame_start + self.interval - time.perf_counter()) * 1000))
+        self._timer = self.root.after(delay, self._tick)
+
+    def _tick(self):
+        self._timer = None
+        now = time.perf_counter()
+        if self._last_frame is not None:
+            self.dropped += max(0, int((now - self._last_frame) / self.interval) - 1)
+        self._last_frame = now
+        self.frames += 1
+
+        finished = []
+        for animation in self.animations:
+            t = (now - animation.start) / animation.duration if animation.duration > 0 else 1.0
+            if t >= 1:
+                animation.update(1.0)
+                finished.append(animation)
+            elif t > 0:
+                animation.update(animation.ease(t))
+        for animation in finished:
+            self.animations.remove(animation)
+        for animation in finished:
+            if animation.done is not None:
+                animation.done()
+
+        if not self.animations:
+            self._last_frame = None
+        elif self._timer is None:  # a done callback may have started the timer already
+            self._schedule(now)
@@ -0,0 +1,158 @@
+"""Headless engine benchmark over a fixed set of positions.
+
+Runs the engine at every depth up to --depth on each position and reports
+nodes searched, nodes per second, time-to-depth, effective branching factor
+and the best move. Results are written as JSON so runs of different versions
+can be diffed.
+
+    python benchmark.py --depth 4 --output bench.json
+"""
+import argparse
+import json
+import platform
+import time
+
+import chess as ch
+
+from ChessEngine import Engine
+from move_ordering import MoveOrderer
+
+# (name, category, FEN)
+POSITIONS = [
+    ("start", "opening", ch.STARTING_FEN),
+    ("italian", "opening", "r1bqk1nr/pppp1ppp/2n5/2b1p3/2B1P3/5N2/PPPP1PPP/RNBQK2R w KQkq - 4 4"),
+    ("qgd", "opening", "rnbqkb1r/ppp2ppp/4pn2/3p4/2PP4/2N5/PP2PPPP/R1BQKBNR w KQkq - 2 4"),
+    ("kiwipete", "middlegame", "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1"),
+    ("carlsbad", "middlegame", "r1bq1rk1/pp2bppp/2n1pn2/2pp4/2PP4/2NBPN2/PP3PPP/R1BQ1RK1 w - - 0 8"),
+    ("open-center", "middlegame", "r2q1rk1/pp1bbppp/2n1pn2/3p4/3P4/2NBPN2/PP3PPP/R1BQ1RK1 w - - 0 10"),
+    ("wac-001", "tactical", "2rr3k/pp3pp1/1nnqbN1p/3pN3/2pP4/2P3Q1/PPB4P/R4RK1 w - - 0 1"),
+    ("wac-002", "tactical", "8/7p/5k2/5p2/p1p2P2/Pr1pPK2/1P1R3P/8 b - - 0 1"),
+    ("wac-004", "tactical", "r1b2rk1/ppbn1ppp/4p3/1QP4q/3P4/N4N2/5PPP/R1B2RK1 w - - 0 1"),
+    ("kpk", "endgame", "8/8/8/4k3/8/8/4P3/4K3 w - - 0 1"),
+    ("rook-endgame", "endgame", "8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1"),
+    ("queen-vs-rook", "endgame", "3k4/8/8/8/8/8/3r4/3QK3 w - - 0 1"),
+]
+
+
+def run_position(fen, max_depth, engine_options):
+    """Search fen to every depth up to max_depth, each with a fresh engine"""
+    depths = []
+    previous_nodes = None
+    for depth in range(1, max_depth + 1):
+        board = ch.Board(fen)
+        engine = Engine(board, depth, board.turn, **engine_options)
+        try:
+            start = time.perf_counter()
+            move = engine.getBestMove()
+            elapsed = time.perf_counter() - start
+            # Before close(), which releases the tablebase and its counters
+            stats = engine.searchStats()
+        finally:
+            engine.close()
+
+        nodes = stats['nodes']
+        depths.append({
+            'depth': depth,
+            'nodes': nodes,
+            'qNodes': stats['qNodes'],
+            'leafEvals': stats['leafEvals'],
+            'selDepth': stats['selDepth'],
+            'time': round(elapsed, 4),
+            'nps': round(nodes / elapsed) if elapsed > 0 else 0,
+            'ebf': round(nodes / previous_nodes, 2) if previous_nodes else None,
+            'tbHits': stats['tbHits'],
+            'tbNodesSaved': stats['tbNodesSaved'],
+            'tablebase': stats.get('tablebase'),  # probe and cache hit counts (None without --syzygy)
+            'bestMove': move.uci() if isinstance(move, ch.Move) else None,
+            'score': engine.bestScore,
+        })
+        previous_nodes = nodes
+    return depths
+
+
+def run_benchmark(max_depth, engine_options, categories=None, log=print):
+    results = []
+    for name, category, fen in POSITIONS:
+        if categories and category not in categories:
+            continue
+        depths = run_position(fen, max_depth, engine_options)
+        results.append({'name': name, 'category': category, 'fen': fen, 'depths': depths})
+        if log:
+            last = depths[-1]
+            log(f"{name:14} {category:11} depth {last['depth']:2}  nodes {last['nodes']:9}  "
+                f"{last['nps']:7} nps  {last['time']:8.3f} s  ebf {last['ebf'] or '-':>6}  "
+                f"best {last['bestMove']}")
+    return results
+
+
+def summarize(results):
+    """Totals over all positions at the deepest searched depth"""
+    nodes = sum(result['depths'][-1]['nodes'] for result in results)
+    seconds = sum(result['depths'][-1]['time'] for result in results)
+    return {
+        'positions': len(results),
+        'nodes': nodes,
+        'time': round(seconds, 4),
+        'nps': round(nodes / seconds) if seconds > 0 else 0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the chess engine on a fixed position suite")
+    parser.add_argument("--depth", type=int, default=4, help="deepest search depth in plies (default 4)")
+    parser.add_argument("--output", help="write the results as JSON to this file")
+    parser.add_argument("--label", default="", help="free text stored with the results (e.g. a version)")
+    parser.add_argument("--category", action="append",
+                        choices=sorted({category for _, category, _ in POSITIONS}),
+                        help="only run positions of this category (repeatable)")
+    parser.add_argument("--workers", type=int, default=1, help="search processes (default 1)")
+    parser.add_argument("--no-quiescence", action="store_true", help="disable the quiescence search")
+    parser.add_argument("--no-ordering", action="store_true", help="search moves in generator order")
+    parser.add_argument("--no-null-move", action="store_true", help="disable null move pruning")
+    parser.add_argument("--no-lmr", action="store_true", help="disable late move reductions")
+    parser.add_argument("--no-futility", action="store_true", help="disable (reverse) futility pruning")
+    parser.add_argument("--syzygy", metavar="DIR", help="probe the Syzygy tablebases in this directory")
+    args = parser.parse_args()
+
+    engine_options = {
+        'workers': args.workers,
+        'quiescence': not args.no_quiescence,
+        'nullMove': not args.no_null_move,
+        'lmr': not args.no_lmr,
+        'futility': not args.no_futility,
+        'tablebasePath': args.syzygy,
+        'jitter': 0,  # reproducible node counts
+    }
+    if args.no_ordering:
+        engine_options['orderer'] = MoveOrderer()
+
+    results = run_benchmark(args.depth, engine_options, args.category)
+    summary = summarize(results)
+    print(f"total: {summary['nodes']} nodes in {summary['time']:.3f} s ({summary['nps']} nps)")
+
+    if args.output:
+        report = {
+            'label': args.label,
+            'date': time.strftime("%Y-%m-%d %H:%M:%S"),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'settings': {
+                'depth': args.depth,
+                'workers': args.workers,
+                'quiescence': not args.no_quiescence,
+                'ordering': not args.no_ordering,
+                'nullMove': not args.no_null_move,
+                'lmr': not args.no_lmr,
+                'futility': not args.no_futility,
+                'syzygy': args.syzygy,
+            },
+            'summary': summary,
+            'positions': results,
+        }
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,25 @@
 import chess as ch
+import os
+import queue
 import tkinter as tk
 from tkinter import simpledialog, messagebox, ttk
-from ChessEngine import Engine
-from PIL import Image, ImageTk
+from ChessEngine import Engine, MAX_DEPTH, mateIn
+from engine_worker import EngineWorker
+from animation import Animator
+from sprites import SpriteCache
+
+# Optional Polyglot opening book and Syzygy tablebases, used when present
+BOOK_PATH = "book.bin"
+SYZYGY_PATH = "syzygy"
+
+# Opacity steps of a captured piece fading out
+FADE_LEVELS = 8
+
+# Board square size in pixels at startup, and the smallest the window can shrink it to
+SQUARE_SIZE = 80
+MIN_SQUARE_SIZE = 32
+# The board is only laid out again once the window has stopped resizing for this long (ms)
+RESIZE_DELAY = 150
 
 class ChessGUI:
     def __init__(self, root, board):
@@ -21,23 +38,36 @@ class ChessGUI:
             self.root.destroy()
             return
 
-        self.user_color, self.depth = config_result
+        self.user_color, self.time_limit, self.ponder = config_result
 
-        # Adjust engine color based on user choice
-        self.engine = Engine(self.board, self.depth, ch.BLACK if self.user_color == ch.WHITE else ch.WHITE)
+        # Adjust engine color based on user choice (searches deeper until its time budget runs out)
+        self.engine = Engine(self.board, MAX_DEPTH, ch.BLACK if self.user_color == ch.WHITE else ch.WHITE,
+                             timeLimit=self.time_limit,
+                             bookPath=BOOK_PATH if os.path.exists(BOOK_PATH) else None,
+                             tablebasePath=SYZYGY_PATH if os.path.isdir(SYZYGY_PATH) else None)
+        # Searches run on a background thread so the window stays responsive
+        self.engine_worker = EngineWorker(self.engine)
+        self.pending_search = None  # Job id of the search we are waiting for
+        self.ponder_search = None  # Job id of the search running during the user's turn
+        self.ponder_move = None  # User move that search expects
         self.selected_piece = None
-        self.piece_images = {}
+        self.sprites = SpriteCache()  # Piece images per size, rendered on first use
+        self.square_size = SQUARE_SIZE
+        self.resize_job = None  # Pending relayout after a window resize
+        self.board_items = []  # (canvas item, column, row, text offset) of the squares and coordinates
+        self.square_items = {}  # Square -> canvas image item showing its piece
+        self.square_pieces = {}  # Square -> image key shown there (None = hidden)
         
         # Move history and navigation system
         self.move_history = []  # List of move data
+        self.listed_plies = 0  # Plies of move_history shown in the move list
         self.current_position = 0  # Current position in history (-1 = live game)
         self.game_board = self.board.copy()  # Actual game state
         self.display_board = self.board.copy()  # Board shown to user
         self.is_reviewing = False  # Are we in review mode?
-        self.animation_in_progress = False  # Animation lock
+        self.animator = Animator(self.root)  # Runs all piece animations
+        self.animating_squares = set()  # Squares left empty for pieces moving there
         
-        self.load_images()
-
         # Now show the main window properly with navigation panel
         self.root.overrideredirect(False)  # Restore window decorations
         window_width = 900  # 640 for board + 250 for navigation panel + 10 padding
@@ -61,21 +91,23 @@ class ChessGUI:
         self.main_container.pack(fill=tk.BOTH, expand=True)
         
         # Create chess board canvas
-        self.canvas = tk.Canvas(self.main_container, width=640, height=640)
-        self.canvas.pack(side=tk.LEFT)
+        self.canvas = tk.Canvas(self.main_container, width=8 * SQUARE_SIZE, height=8 * SQUARE_SIZE,
+                                highlightthickness=0)
+        self.canvas.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
         
         # Create navigation panel
         self.create_navigation_panel()
 
         self.draw_board()  # Draw the board
         self.bind_events()
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
 
         if self.engine.color == ch.WHITE:
             self.root.after(500, self.engine_move)  # Ensure engine makes a move if it's White
 
     def get_difficulty_name(self):
-        """Convert depth number to difficulty name"""
-        return f"Depth {self.depth}"
+        """Convert the engine time budget to a difficulty name"""
+        return f"{self.time_limit / 1000:g} s per move"
 
     def create_navigation_panel(self):
         """Create the modern right-side navigation panel"""
@@ -107,9 +139,14 @@ class ChessGUI:
         difficulty_icons = {"Easy": "🟢", "Medium": "🟡", "Hard": "🔴"}
         difficulty_icon = difficulty_icons.get(self.get_difficulty_name(), "⚪")
         difficulty_info = tk.Label(player_frame, 
-                                  text=f"Difficulty: {difficulty_icon} {self.get_difficulty_name()} (Depth {self.depth})", 
+                                  text=f"Difficulty: {difficulty_icon} {self.get_difficulty_name()}", 
                                   font=("Arial", 10), bg="#eff6ff", fg="#64748b")
-        difficulty_info.pack(pady=(0, 8))
+        difficulty_info.pack(pady=(0, 4))
+        
+        # Live engine output: depth, score, nodes and principal variation
+        self.thinking_label = tk.Label(player_frame, text="", font=("Consolas", 8),
+                                       bg="#eff6ff", fg="#64748b", justify=tk.LEFT, wraplength=220)
+        self.thinking_label.pack(pady=(0, 8))
         
         # Move History Section
         history_frame = tk.Frame(self.nav_panel, bg="#f8fafc", relief=tk.FLAT, bd=1)
@@ -239,7 +276,7 @@ class ChessGUI:
         move_data = {
             'move': move,
             'notation': notation,
-            'fen': self.board.fen()  # Store FEN before the move
+            'fen': self.board.fen()  # Position after the move (see board_at)
         }
         
         self.move_history.append(move_data)
@@ -250,35 +287,45 @@ class ChessGUI:
         
         self.update_navigation_state()
 
-    def update_move_list(self):
-        """Update the move list display with paired moves"""
-        self.move_listbox.delete(0, tk.END)
-        
-        i = 0
-        while i < len(self.move_history):
-            move_num = (i // 2) + 1
-            white_move = self.move_history[i]['notation'] if i < len(self.move_history) else ""
-            black_move = self.move_history[i + 1]['notation'] if i + 1 < len(self.move_history) else ""
-            
-            if black_move:
-                # Both white and black moves
-                display_text = f"{move_num}. {white_move} {black_move}"
-            else:
-                # Only white move
-                display_text = f"{move_num}. {white_move}"
-            
-            self.move_listbox.insert(tk.END, display_text)
-            i += 2
+    def update_move_list(self, from_ply=None):
+        """Update the move list display with paired moves.
+
+        Only the lines from from_ply on are rewritten: by default the plies
+        added since the last update, so a White move appends a line and a
+        Black move rewrites the last one whatever the length of the game.
+        After cutting the history, pass the ply where it was cut.
+        """
+        if from_ply is None:
+            from_ply = self.listed_plies
+        first_line = min(from_ply, self.listed_plies, len(self.move_history)) // 2
+
+        self.move_listbox.delete(first_line, tk.END)
+        # One Tk call for all the new lines (a whole game when rebuilding the list)
+        lines = [self.move_list_line(i) for i in range(first_line * 2, len(self.move_history), 2)]
+        if lines:
+            self.move_listbox.insert(tk.END, *lines)
+        self.listed_plies = len(self.move_history)
         
         # Scroll to bottom and highlight current position if reviewing
         self.move_listbox.see(tk.END)
         if self.is_reviewing:
             self.highlight_current_move()
 
+    def move_list_line(self, i):
+        """Line of the move list starting with the White move at ply i"""
+        move_num = (i // 2) + 1
+        white_move = self.move_history[i]['notation']
+        if i + 1 < len(self.move_history):
+            # Both white and black moves
+            return f"{move_num}. {white_move} {self.move_history[i + 1]['notation']}"
+        # Only white move
+        return f"{move_num}. {white_move}"
+
     # Navigation methods
     def go_to_first(self):
         """Go to the first move"""
         if self.move_history:
+            self.cancel_engine_search()
             self.current_position = 0
             self.is_reviewing = True
             self.show_position(self.current_position)
@@ -286,6 +333,7 @@ class ChessGUI:
     def go_to_previous(self):
         """Go to the previous move"""
         if self.current_position > 0:
+            self.cancel_engine_search()
             self.current_position -= 1
             self.is_reviewing = True
             self.show_position(self.current_position)
@@ -309,15 +357,12 @@ class ChessGUI:
         """Go to the last move (live game)"""
         if self.move_history:
             self.current_position = len(self.move_history) - 1
-            
-            # Properly synchronize board state when returning to live mode
-            # Rebuild the main board from move history to ensure consistency
-            self.board = ch.Board()
-            for move_data in self.move_history:
-                self.board.push(move_data['move'])
-            
-            # Sync display board with main board
-            self.display_board = self.board.copy()
+
+            self.animator.finish_all()
+
+            # The live board is never touched while reviewing: show it again
+            # (a copy without the move stack, so this doesn't grow with the game)
+            self.display_board = self.board.copy(stack=False)
             
             # Exit review mode
             self.is_reviewing = False
@@ -336,12 +381,8 @@ class ChessGUI:
     def show_position(self, position):
         """Display the board at a specific position in history"""
         if 0 <= position < len(self.move_history):
-            # Create board state up to this position
-            temp_board = ch.Board()
-            for i in range(position + 1):
-                temp_board.push(self.move_history[i]['move'])
-            
-            self.display_board = temp_board.copy()
+            self.animator.finish_all()
+            self.display_board = self.board_at(position)
             self.draw_pieces()
             
             # Highlight the current move in paired list
@@ -349,6 +390,15 @@ class ChessGUI:
             
         self.update_navigation_state()
 
+    def board_at(self, position):
+        """Board after the move at position in the history.
+
+        Built from the FEN stored with that move instead of replaying the game
+        from the start, so stepping through the history costs the same however
+        long the game is.
+        """
+        return ch.Board(self.move_history[position]['fen'])
+
     def highlight_current_move(self):
         """Highlight the current move in the paired move list"""
         if self.move_history and self.is_reviewing:
@@ -373,6 +423,7 @@ class ChessGUI:
             if move_position >= len(self.move_history):
                 move_position = len(self.move_history) - 1
             
+            self.cancel_engine_search()
             self.current_position = move_position
             self.is_reviewing = True
             self.show_position(move_position)
@@ -381,6 +432,12 @@ class ChessGUI:
         """Start a new game"""
         result = messagebox.askyesno("New Game", "Start a new game? Current game will be lost.")
         if result:
+            # The engine may still be thinking about the old game
+            self.cancel_engine_search()
+            self.animator.finish_all()
+            # Forget the old game's transposition table and move ordering history
+            self.engine_worker.new_game()
+
             # Reset all game state
             self.game_board = ch.Board()
             self.display_board = ch.Board()
@@ -390,8 +447,9 @@ class ChessGUI:
             self.is_reviewing = False
             self.selected_piece = None
             
-            # Clear move listbox
-            self.move_listbox.delete(0, tk.END)
+            # Clear move listbox and engine output
+            self.update_move_list(0)
+            self.thinking_label.config(text="")
             
             # Redraw board
             self.draw_board()
@@ -469,8 +527,8 @@ class ChessGUI:
         def on_start_game():
             nonlocal result
             color = ch.WHITE if color_var.get() == 'white' else ch.BLACK
-            depth = int(depth_var.get())
-            result = (color, depth)
+            time_limit = int(float(time_var.get()) * 1000)
+            result = (color, time_limit, ponder_var.get())
             top.destroy()
         
         def on_cancel():
@@ -485,13 +543,13 @@ class ChessGUI:
         
         # Center the dialog on screen with improved sizing
         dialog_width = 450
-        dialog_height = 485
+        dialog_height = 515
         screen_width = self.root.winfo_screenwidth()
         screen_height = self.root.winfo_screenheight()
         x = (screen_width - dialog_width) // 2
         y = (screen_height - dialog_height) // 2
         top.geometry(f"{dialog_width}x{dialog_height}+{x}+{y}")
-        top.minsize(450, 485)  # Ensure minimum size
+        top.minsize(450, 515)  # Ensure minimum size
         
         # Make dialog modal and ensure it appears on top
         top.transient(self.root)
@@ -520,21 +578,26 @@ class ChessGUI:
         tk.Radiobutton(color_frame, text="Black", variable=color_var, 
                       value="black", font=("Arial", 11)).pack(anchor=tk.W, pady=3)
         
-        # Engine depth selection frame with better styling
-        depth_frame = tk.LabelFrame(main_frame, text="Choose Engine Depth", 
+        # Engine think time selection frame with better styling
+        time_frame = tk.LabelFrame(main_frame, text="Choose Engine Think Time", 
                                    font=("Arial", 12, "bold"), padx=15, pady=12)
-        depth_frame.pack(fill=tk.X, pady=(0, 20))
+        time_frame.pack(fill=tk.X, pady=(0, 20))
         
-        # Depth selection label and dropdown
-        depth_label = tk.Label(depth_frame, text="Engine Depth:", font=("Arial", 11))
-        depth_label.pack(anchor=tk.W, pady=(0, 5))
+        # Think time label and dropdown (seconds per engine move)
+        time_label = tk.Label(time_frame, text="Seconds per move:", font=("Arial", 11))
+        time_label.pack(anchor=tk.W, pady=(0, 5))
         
-        depth_var = tk.StringVar(value="3")
-        depth_dropdown = ttk.Combobox(depth_frame, textvariable=depth_var, 
-                                     values=["2", "3", "4", "5", "6", "7"],
+        time_var = tk.StringVar(value="2")
+        time_dropdown = ttk.Combobox(time_frame, textvariable=time_var, 
+                                     values=["0.5", "1", "2", "5", "10", "30"],
                                      state="readonly", font=("Arial", 11), width=10)
-        depth_dropdown.pack(anchor=tk.W, pady=(0, 5))
-        depth_dropdown.set("3")  # Default to depth 3
+        time_dropdown.pack(anchor=tk.W, pady=(0, 5))
+        time_dropdown.set("2")  # Default to 2 seconds
+
+        # Let the engine think on the expected reply during the user's turn
+        ponder_var = tk.BooleanVar(value=False)
+        tk.Checkbutton(time_frame, text="Think on my time (pondering)", variable=ponder_var,
+                       font=("Arial", 11)).pack(anchor=tk.W, pady=(5, 0))
         
         # Button frame with proper spacing to ensure visibility
         button_frame = tk.Frame(main_frame)
@@ -559,24 +622,29 @@ class ChessGUI:
         self.root.wait_window(top)
         return result
 
-    def load_images(self):
-        pieces = ['wk', 'wq', 'wr', 'wb', 'wn', 'wp', 'bk', 'bq', 'br', 'bb', 'bn', 'bp']
-        for piece in pieces:
-            image = Image.open(f'images/{piece}.png')
-            image = image.resize((80, 80), Image.LANCZOS)
-            self.piece_images[piece] = ImageTk.PhotoImage(image)
+    def piece_image(self, key):
+        """Image of the piece key ('wk', 'bp', ...) at the current square size"""
+        return self.sprites.photo(key, self.square_size)
+
+    def coordinate_font(self):
+        return ("Arial", max(6, self.square_size // 10), "bold")
 
     def draw_board(self):
-        self.canvas.delete("board")  # Clear previous board to prevent overlaps
-        self.canvas.delete("coordinates")  # Clear previous coordinates
-        
+        # The squares and coordinates are only created once (resize_board() moves them)
+        if self.canvas.find_withtag("board"):
+            self.draw_pieces()
+            return
+
+        size = self.square_size
         for i in range(8):
             for j in range(8):
                 color = "#FFFACD" if (i + j) % 2 == 0 else "#593E1A"
                 # Flip board if user is black
-                x0 = (j if self.user_color == ch.WHITE else 7-j) * 80
-                y0 = (i if self.user_color == ch.WHITE else 7-i) * 80
-                self.canvas.create_rectangle(x0, y0, x0 + 80, y0 + 80, fill=color, tags="board")
+                col = j if self.user_color == ch.WHITE else 7-j
+                row = i if self.user_color == ch.WHITE else 7-i
+                x0, y0 = col * size, row * size
+                item = self.canvas.create_rectangle(x0, y0, x0 + size, y0 + size, fill=color, tags="board")
+                self.board_items.append((item, col, row, None))
                 
                 # Add coordinates
                 text_color = "#333333" if (i + j) % 2 == 0 else "#CCCCCC"
@@ -590,8 +658,9 @@ class ChessGUI:
                         actual_j = 7 - j  # Get the actual file index before flipping
                         file_letter = chr(ord('h') - actual_j)
                     # Bottom-right corner of square (moved closer to corner)
-                    self.canvas.create_text(x0 + 72, y0 + 75, text=file_letter, 
-                                          font=("Arial", 8, "bold"), fill=text_color, tags="coordinates")
+                    item = self.canvas.create_text(x0 + size * 0.9, y0 + size * 0.94, text=file_letter,
+                                                   font=self.coordinate_font(), fill=text_color, tags="coordinates")
+                    self.board_items.append((item, col, row, (0.9, 0.94)))
                 
                 # Add rank numbers (1-8) on leftmost column only
                 if (self.user_color == ch.WHITE and j == 0) or (self.user_color == ch.BLACK and j == 7):
@@ -602,113 +671,213 @@ class ChessGUI:
                         actual_i = 7 - i  # Get the actual rank index before flipping
                         rank_number = str(actual_i + 1)
                     # Top-left corner of square (moved closer to corner)
-                    self.canvas.create_text(x0 + 8, y0 + 12, text=rank_number, 
-                                          font=("Arial", 8, "bold"), fill=text_color, tags="coordinates")
+                    item = self.canvas.create_text(x0 + size * 0.1, y0 + size * 0.15, text=rank_number,
+                                                   font=self.coordinate_font(), fill=text_color, tags="coordinates")
+                    self.board_items.append((item, col, row, (0.1, 0.15)))
         
         self.draw_pieces()
 
-    def draw_pieces(self, exclude_square=None):
-        """Draw pieces on the board, optionally excluding one square"""
-        self.canvas.delete("pieces")  # Clear previous pieces
-        
+    def draw_pieces(self):
+        """Draw pieces on the board (not on the squares pieces are animating to).
+
+        Every square keeps its own image item once it has shown a piece;
+        only the squares whose piece changed since the last call are
+        re-imaged or hidden, so redrawing creates no canvas items.
+        """
         # Use display_board for showing positions during review
         board_to_display = self.display_board if self.is_reviewing else self.board
-        
-        for i in range(8):
-            for j in range(8):
-                square = ch.square(j, 7 - i)
-                if exclude_square is not None and square == exclude_square:
-                    continue  # Skip this square (for animation)
-                    
-                piece = board_to_display.piece_at(square)
-                if piece is not None:
-                    piece_symbol = piece.symbol().lower()
-                    color_prefix = 'w' if piece.color == ch.WHITE else 'b'
-                    piece_image = self.piece_images[color_prefix + piece_symbol]
-                    # Flip board if user is black
-                    x = (j if self.user_color == ch.WHITE else 7-j) * 80 + 40
-                    y = (i if self.user_color == ch.WHITE else 7-i) * 80 + 40
-                    self.canvas.create_image(x, y, image=piece_image, tags="pieces")
-
-    def animate_move(self, from_square, to_square, move, duration=250, callback=None):
-        """Animate a piece moving from one square to another"""
-        if self.animation_in_progress:
+        piece_map = board_to_display.piece_map()
+        for square in self.animating_squares:
+            piece_map.pop(square, None)
+
+        created = False
+        for square in ch.SQUARES:
+            piece = piece_map.get(square)
+            key = None if piece is None else self.piece_key(piece)
+            if self.square_pieces.get(square) == key:
+                continue
+            self.square_pieces[square] = key
+
+            item = self.square_items.get(square)
+            if key is None:
+                self.canvas.itemconfigure(item, state=tk.HIDDEN)
+            elif item is not None:
+                self.canvas.itemconfigure(item, image=self.piece_image(key), state=tk.NORMAL)
+            else:
+                x, y = self.square_center(square)
+                self.square_items[square] = self.canvas.create_image(
+                    x, y, image=self.piece_image(key), tags="pieces")
+                created = True
+
+        if created:
+            # New items start on top: keep highlights and moving pieces above them
+            self.canvas.tag_raise("highlights")
+            self.canvas.tag_raise("animation")
+
+    def on_canvas_resize(self, event):
+        """Fit the board to the canvas once the window has stopped resizing"""
+        size = max(MIN_SQUARE_SIZE, min(event.width, event.height) // 8)
+        if self.resize_job is not None:
+            self.root.after_cancel(self.resize_job)
+        self.resize_job = self.root.after(RESIZE_DELAY, lambda: self.resize_board(size))
+
+    def resize_board(self, size):
+        """Lay the board out again with squares of size pixels.
+
+        The existing canvas items are moved and re-imaged rather than
+        recreated; piece images at the new size come from the sprite cache.
+        """
+        self.resize_job = None
+        if size == self.square_size:
             return
-            
-        self.animation_in_progress = True
-        
+        # Moving pieces would end up on the old squares
+        self.animator.finish_all()
+        self.square_size = size
+
+        font = self.coordinate_font()
+        for item, col, row, offset in self.board_items:
+            x0, y0 = col * size, row * size
+            if offset is None:
+                self.canvas.coords(item, x0, y0, x0 + size, y0 + size)
+            else:
+                self.canvas.coords(item, x0 + size * offset[0], y0 + size * offset[1])
+                self.canvas.itemconfigure(item, font=font)
+
+        for square, item in self.square_items.items():
+            self.canvas.coords(item, *self.square_center(square))
+            key = self.square_pieces.get(square)
+            # Hidden items get their new image when draw_pieces() shows them again
+            if key is not None:
+                self.canvas.itemconfigure(item, image=self.piece_image(key))
+
+        if self.selected_piece is not None:
+            self.highlight_squares([move for move in self.board.legal_moves
+                                    if move.from_square == self.selected_piece])
+
+    def animate_move(self, from_square, to_square, move, duration=250, callback=None, on_done=None):
+        """Play a move and animate it.
+
+        The move is made on the board (and added to the history) right away
+        and callback() is called, so the engine can start its next search
+        while the pieces are still moving. The moving piece then glides to its
+        square on the animator's timer, with the rook of a castling move
+        alongside and a captured piece fading out; on_done() is called once
+        everything has arrived.
+        """
+        # A move made while the previous one is still animating: finish that one first
+        self.animator.finish_all()
+
         # Get piece at from_square
         piece = self.board.piece_at(from_square)
         if piece is None:
-            self.animation_in_progress = False
             if callback:
                 callback()
+            if on_done:
+                on_done()
             return
         
         # Generate notation BEFORE making the move to avoid board state issues
         notation = self.board.san(move)
-        
-        # Calculate positions
-        from_file, from_rank = from_square % 8, 7 - from_square // 8
-        to_file, to_rank = to_square % 8, 7 - to_square // 8
-        
+
+        # (image key, from square, to square) of every piece that moves
+        sprites = [(self.piece_key(piece), from_square, to_square)]
+        if self.board.is_castling(move):
+            rank = ch.square_rank(from_square) * 8
+            kingside = self.board.is_kingside_castling(move)
+            rook = self.piece_key(ch.Piece(ch.ROOK, piece.color))
+            sprites.append((rook, rank + 7 if kingside else rank, rank + 5 if kingside else rank + 3))
+        # (image key, square) of a captured piece
+        captured = None
+        if self.board.is_en_passant(move):
+            captured_square = to_square - 8 if piece.color == ch.WHITE else to_square + 8
+            captured = (self.piece_key(ch.Piece(ch.PAWN, not piece.color)), captured_square)
+        elif self.board.piece_at(to_square) is not None:
+            captured = (self.piece_key(self.board.piece_at(to_square)), to_square)
+
+        # Execute the actual move on both boards
+        self.board.push(move)
+        self.game_board = self.board.copy()  # Keep boards in sync
+
+        # Add to history with pre-generated notation
+        self.add_move_to_history(move, notation)
+
+        # The destination squares stay empty until the moving pieces get there
+        self.animating_squares = {square for _, _, square in sprites}
+        self.draw_pieces()
+
+        remaining = [len(sprites) + (captured is not None)]
+
+        def finished():
+            remaining[0] -= 1
+            if remaining[0] == 0:
+                self.animating_squares = set()
+                self.draw_pieces()
+                if on_done:
+                    on_done()
+
+        if captured is not None:
+            self.fade_out(captured[0], captured[1], duration * 0.6 / 1000, finished)
+        for key, start_square, end_square in sprites:
+            self.slide(key, start_square, end_square, duration / 1000, finished)
+
+        if callback:
+            callback()
+
+    def square_center(self, square):
+        """Canvas coordinates of the center of square"""
+        col, row = ch.square_file(square), 7 - ch.square_rank(square)
         # Flip coordinates if user is black
         if self.user_color == ch.BLACK:
-            from_file, from_rank = 7 - from_file, 7 - from_rank
-            to_file, to_rank = 7 - to_file, 7 - to_rank
-        
-        start_x = from_file * 80 + 40
-        start_y = from_rank * 80 + 40
-        end_x = to_file * 80 + 40
-        end_y = to_rank * 80 + 40
-        
-        # Create piece image for animation
-        piece_symbol = piece.symbol().lower()
-        color_prefix = 'w' if piece.color == ch.WHITE else 'b'
-        piece_image = self.piece_images[color_prefix + piece_symbol]
-        
-        # Draw board without the moving piece
-        self.draw_pieces(exclude_square=from_square)
-        
-        # Create animated piece
-        animated_piece = self.canvas.create_image(start_x, start_y, image=piece_image, tags="animation")
-        
-        # Animation parameters
-        steps = 20
-        step_duration = duration // steps
-        dx = (end_x - start_x) / steps
-        dy = (end_y - start_y) / steps
-        
-        def animate_step(step):
-            if step <= steps:
-                current_x = start_x + dx * step
-                current_y = start_y + dy * step
-                self.canvas.coords(animated_piece, current_x, current_y)
-                
-                if step < steps:
-                    self.root.after(step_duration, lambda: animate_step(step + 1))
-                else:
-                    # Animation complete - execute the move
-                    self.canvas.delete("animation")
-                    self.animation_in_progress = False
-                    
-                    # Execute the actual move on both boards
-                    self.board.push(move)
-                    self.game_board = self.board.copy()  # Keep boards in sync
-                    
-                    # Add to history with pre-generated notation
-                    self.add_move_to_history(move, notation)
-                    
-                    # Redraw pieces
-                    self.draw_pieces()
-                    
-                    if callback:
-                        callback()
-        
-        animate_step(0)
+            col, row = 7 - col, 7 - row
+        size = self.square_size
+        return col * size + size // 2, row * size + size // 2
+
+    def slide(self, key, from_square, to_square, duration, done):
+        """Animate the piece image key from one square to another"""
+        start_x, start_y = self.square_center(from_square)
+        end_x, end_y = self.square_center(to_square)
+        item = self.canvas.create_image(start_x, start_y, image=self.piece_image(key), tags="animation")
+
+        def update(t):
+            self.canvas.coords(item, start_x + (end_x - start_x) * t, start_y + (end_y - start_y) * t)
+
+        def finished():
+            self.canvas.delete(item)
+            done()
+
+        self.animator.add(duration, update, finished)
+
+    def fade_out(self, key, square, duration, done):
+        """Fade the piece image key on square out (a captured piece)"""
+        x, y = self.square_center(square)
+        # Created before the moving pieces, so it stays below them
+        item = self.canvas.create_image(x, y, image=self.piece_image(key), tags="animation")
+        shown = [FADE_LEVELS]
+
+        def update(t):
+            level = round((1 - t) * FADE_LEVELS)
+            if level != shown[0]:
+                shown[0] = level
+                self.canvas.itemconfigure(item, image=self.faded_image(key, level))
+
+        def finished():
+            self.canvas.delete(item)
+            done()
+
+        self.animator.add(duration, update, finished, ease=lambda t: t)
+
+    def faded_image(self, key, level):
+        """Piece image at opacity level / FADE_LEVELS, made on first use"""
+        return self.sprites.faded(key, self.square_size, level, FADE_LEVELS)
+
+    @staticmethod
+    def piece_key(piece):
+        """Image key of a piece ('wk', 'bp', ...)"""
+        return ('w' if piece.color == ch.WHITE else 'b') + piece.symbol().lower()
 
     def bind_events(self):
         self.canvas.bind("<Button-1>", self.handle_click)
+        self.canvas.bind("<Configure>", self.on_canvas_resize)
         # Add keyboard navigation
         self.root.bind("<Left>", lambda e: self.go_to_previous())
         self.root.bind("<Right>", lambda e: self.go_to_next())
@@ -892,12 +1061,14 @@ class ChessGUI:
         return result
 
     def handle_click(self, event):
-        # Don't allow moves during animation or when reviewing
-        if self.animation_in_progress or self.is_reviewing:
+        # Don't allow moves when reviewing (a move during an animation finishes it)
+        if self.is_reviewing:
             return
             
-        col = event.x // 80
-        row = event.y // 80
+        col = event.x // self.square_size
+        row = event.y // self.square_size
+        if not (0 <= col < 8 and 0 <= row < 8):
+            return  # The canvas is wider or taller than the board
         # Adjust coordinates based on user color
         if self.user_color == ch.BLACK:
             col, row = 7 - col, 7 - row
@@ -912,13 +1083,10 @@ class ChessGUI:
         elif self.selected_piece is not None:
             move = self.create_move(self.selected_piece, square)
             if move in self.board.legal_moves:
-                # Use animation for the move, and check game over after user move
-                def after_user_move():
-                    self.check_game_over()
-                    if not self.board.is_game_over():
-                        self.engine_move()
-                
-                self.animate_move(self.selected_piece, square, move, callback=after_user_move)
+                # The engine starts thinking while the move is animated; the
+                # game over check waits until the piece has arrived
+                self.animate_move(self.selected_piece, square, move, callback=self.engine_move,
+                                  on_done=self.check_game_over)
             else:
                 messagebox.showinfo("Invalid Move", "That move is not legal.")
             self.selected_piece = None
@@ -934,48 +1102,124 @@ class ChessGUI:
             # Adjust coordinates based on user color
             if self.user_color == ch.BLACK:
                 col, row = 7 - col, 7 - row
-            self.canvas.create_rectangle(col * 80, row * 80, (col + 1) * 80, (row + 1) * 80, 
+            size = self.square_size
+            self.canvas.create_rectangle(col * size, row * size, (col + 1) * size, (row + 1) * size,
                                           fill="green",stipple="gray25",outline="", tags="highlights")
 
     def engine_move(self):
         # Critical check: Only allow engine to move if it's actually the engine's turn
         if (not self.board.is_game_over() and 
             not self.is_reviewing and 
-            self.board.turn == self.engine.color):
+            self.board.turn == self.engine.color and
+            self.pending_search is None):
+            if (self.ponder_search is not None and self.board.move_stack
+                    and self.board.peek() == self.ponder_move):
+                # Ponder hit: the search already running on this position just starts its clock
+                self.pending_search = self.ponder_search
+                self.ponder_search = None
+                self.engine_worker.ponderhit(self.pending_search)
+            else:
+                self.cancel_ponder_search()
+                # Search a copy of the current board in the background
+                self.pending_search = self.engine_worker.submit(self.board)
+            self.root.after(20, self.poll_engine_result)
+        else:
+            # If it's not the engine's turn (or it is already thinking), don't do anything
+            return
+
+    def poll_engine_result(self):
+        """Check whether the background search has finished"""
+        if self.pending_search is None:
+            return  # Search was cancelled
+
+        # Show the iterations completed so far
+        while True:
             try:
-                # Ensure engine has the current board state
-                self.engine.board = self.board.copy()
-                
-                move = self.engine.getBestMove()
-                # Validate that we got a proper move object
-                if hasattr(move, 'from_square') and hasattr(move, 'to_square'):
-                    # Animate engine move
-                    self.animate_move(move.from_square, move.to_square, move, 
-                                    callback=lambda: self.check_game_over())
-                else:
-                    # Fallback: pick a random legal move
-                    legal_moves = list(self.board.legal_moves)
-                    if legal_moves:
-                        import random
-                        move = random.choice(legal_moves)
-                        self.animate_move(move.from_square, move.to_square, move, 
-                                        callback=lambda: self.check_game_over())
-                    else:
-                        self.check_game_over()
-            except Exception as e:
-                # Handle engine error gracefully - fallback to random legal move
-                # Fallback: try random legal move
-                legal_moves = list(self.board.legal_moves)
-                if legal_moves:
-                    import random
-                    move = random.choice(legal_moves)
-                    self.animate_move(move.from_square, move.to_square, move, 
-                                    callback=lambda: self.check_game_over())
-                else:
-                    self.check_game_over()
+                job_id, info = self.engine_worker.progress.get_nowait()
+            except queue.Empty:
+                break
+            if job_id == self.pending_search:
+                self.show_thinking(info)
+
+        if self.animator.busy:
+            # The reply is animated once the user's move has arrived
+            self.root.after(20, self.poll_engine_result)
+            return
+
+        try:
+            job_id, move, error = self.engine_worker.results.get_nowait()
+        except queue.Empty:
+            self.root.after(20, self.poll_engine_result)
+            return
+
+        if job_id != self.pending_search:
+            # Result of a cancelled search, keep waiting for ours
+            self.root.after(20, self.poll_engine_result)
+            return
+
+        self.pending_search = None
+        if self.is_reviewing or self.board.turn != self.engine.color:
+            return  # Position changed while the engine was thinking
+
+        # Validate that we got a proper move object (errors fall back to a random legal move)
+        if error is None and hasattr(move, 'from_square') and hasattr(move, 'to_square'):
+            # Animate engine move (pondering starts while it moves)
+            self.animate_move(move.from_square, move.to_square, move,
+                              callback=self.start_pondering, on_done=self.check_game_over)
         else:
-            # If it's not the engine's turn, don't do anything
+            # Fallback: pick a random legal move
+            legal_moves = list(self.board.legal_moves)
+            if legal_moves:
+                import random
+                move = random.choice(legal_moves)
+                self.animate_move(move.from_square, move.to_square, move,
+                                  on_done=self.check_game_over)
+            else:
+                self.check_game_over()
+
+    def show_thinking(self, info):
+        """Display an engine iteration in the navigation panel"""
+        try:
+            pv = self.board.variation_san(info['pv'])
+        except ValueError:
+            pv = " ".join(move.uci() for move in info['pv'])
+        moves = mateIn(info['score'])
+        score = f"mate {moves:+d}" if moves is not None else f"{info['score'] / 100:+.2f}"
+        self.thinking_label.config(
+            text=f"Depth {info['depth']}/{info['selDepth']}  {score}  "
+                 f"{info['nodes']:,} nodes  {info['time']:.1f} s\n{pv}")
+
+    def start_pondering(self):
+        """Search the position after the user's expected reply while the user thinks"""
+        if not self.ponder or self.is_reviewing or self.board.is_game_over():
+            return
+        reply = self.engine.ponderMove()
+        if reply is None or reply not in self.board.legal_moves:
             return
+        ponder_board = self.board.copy()
+        ponder_board.push(reply)
+        self.ponder_move = reply
+        self.ponder_search = self.engine_worker.submit(ponder_board, ponder=True)
+
+    def cancel_ponder_search(self):
+        """Stop pondering (the user played another move or left the live game)"""
+        if self.ponder_search is not None:
+            self.engine_worker.cancel(self.ponder_search)
+            self.ponder_search = None
+            self.ponder_move = None
+
+    def cancel_engine_search(self):
+        """Stop a running engine search whose result is no longer wanted"""
+        self.cancel_ponder_search()
+        if self.pending_search is not None:
+            self.engine_worker.cancel(self.pending_search)
+            self.pending_search = None
+
+    def on_close(self):
+        """Stop the engine before closing the window"""
+        self.cancel_engine_search()
+        self.engine_worker.shutdown()
+        self.root.destroy()
             
     def check_game_over(self):
         """Check if the game is over and show dialog if needed"""
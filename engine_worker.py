@@ -0,0 +1,108 @@
+import queue
+import threading
+
+
+class EngineWorker:
+    """Runs engine searches on a background thread.
+
+    Searches are queued with submit() and processed one at a time. Finished
+    searches are put on the `results` queue as (job_id, move, error) tuples,
+    so a Tk application can poll them with root.after() instead of blocking
+    its event loop. Each completed iteration is put on the `progress` queue
+    as (job_id, info) with the engine's iteration info dict. cancel() stops
+    the running search and drops queued ones; stop() ends a search early but
+    still reports the best move found so far. new_game() resets the
+    engine's memory of the previous game on the worker thread, once the
+    searches queued before it are done.
+
+    A search submitted with ponder=True runs without a clock until
+    ponderhit() is called for it (see Engine.getBestMove).
+    """
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.results = queue.Queue()
+        self.progress = queue.Queue()
+        self._jobs = queue.Queue()
+        self._lock = threading.Lock()
+        self._next_id = 0
+        self._active = {}  # job id -> stop event of queued/running searches
+        self._ponder = {}  # job id -> ponder hit event of ponder searches
+        self._thread = threading.Thread(target=self._run, name="engine-worker", daemon=True)
+        self._thread.start()
+
+    def submit(self, board, ponder=False, **search_args):
+        """Queue a search of a copy of board and return its job id"""
+        with self._lock:
+            self._next_id += 1
+            job_id = self._next_id
+            stop_event = threading.Event()
+            self._active[job_id] = stop_event
+            if ponder:
+                search_args['ponderHit'] = self._ponder[job_id] = threading.Event()
+        self._jobs.put((job_id, board.copy(), search_args, stop_event))
+        return job_id
+
+    def ponderhit(self, job_id):
+        """The opponent played the move a ponder search expected: start its clock"""
+        with self._lock:
+            event = self._ponder.pop(job_id, None)
+        if event is not None:
+            event.set()
+
+    def stop(self, job_id):
+        """End a search now; its move (of the deepest completed iteration) is still put on results"""
+        with self._lock:
+            event = self._active.get(job_id)
+        if event is not None:
+            event.set()
+
+    def cancel(self, job_id=None):
+        """Stop one search (or all of them when job_id is None)"""
+        with self._lock:
+            if job_id is None:
+                events = list(self._active.values())
+                self._active.clear()
+                self._ponder.clear()
+            else:
+                event = self._active.pop(job_id, None)
+                events = [event] if event is not None else []
+                self._ponder.pop(job_id, None)
+        for event in events:
+            event.set()
+
+    def new_game(self):
+        """Queue Engine.newGame(): it runs after the searches submitted so far, never during one"""
+        self._jobs.put(self.engine.newGame)
+
+    def shutdown(self):
+        """Cancel everything and let the worker thread exit"""
+        self.cancel()
+        self._jobs.put(None)
+
+    def _run(self):
+        while True:
+            job = self._jobs.get()
+            if job is None:
+                return
+            if callable(job):
+                job()
+                continue
+            job_id, board, search_args, stop_event = job
+            with self._lock:
+                if job_id not in self._active:
+                    continue  # cancelled before it started
+
+            move, error = None, None
+            try:
+                self.engine.board = board
+                self.engine.onIteration = lambda info, job_id=job_id: self.progress.put((job_id, info))
+                move = self.engine.getBestMove(stopEvent=stop_event, **search_args)
+            except Exception as e:
+                error = e
+
+            with self._lock:
+                cancelled = self._active.pop(job_id, None) is None
+                self._ponder.pop(job_id, None)
+            if not cancelled:
+                self.results.put((job_id, move, error))
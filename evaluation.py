@@ -0,0 +1,167 @@
+import chess as ch
+
+# Material values in centipawns, indexed by piece type (0 = no piece)
+PIECE_VALUES = [0, 100, 300, 310, 500, 900, 0]
+
+# Piece-square tables in centipawns, seen from White with rank 8 on top
+PAWN_TABLE = [
+     0,   0,   0,   0,   0,   0,   0,   0,
+    50,  50,  50,  50,  50,  50,  50,  50,
+    10,  10,  20,  30,  30,  20,  10,  10,
+     5,   5,  10,  25,  25,  10,   5,   5,
+     0,   0,   0,  20,  20,   0,   0,   0,
+     5,  -5, -10,   0,   0, -10,  -5,   5,
+     5,  10,  10, -20, -20,  10,  10,   5,
+     0,   0,   0,   0,   0,   0,   0,   0,
+]
+
+KNIGHT_TABLE = [
+   -50, -40, -30, -30, -30, -30, -40, -50,
+   -40, -20,   0,   0,   0,   0, -20, -40,
+   -30,   0,  10,  15,  15,  10,   0, -30,
+   -30,   5,  15,  20,  20,  15,   5, -30,
+   -30,   0,  15,  20,  20,  15,   0, -30,
+   -30,   5,  10,  15,  15,  10,   5, -30,
+   -40, -20,   0,   5,   5,   0, -20, -40,
+   -50, -40, -30, -30, -30, -30, -40, -50,
+]
+
+BISHOP_TABLE = [
+   -20, -10, -10, -10, -10, -10, -10, -20,
+   -10,   0,   0,   0,   0,   0,   0, -10,
+   -10,   0,   5,  10,  10,   5,   0, -10,
+   -10,   5,   5,  10,  10,   5,   5, -10,
+   -10,   0,  10,  10,  10,  10,   0, -10,
+   -10,  10,  10,  10,  10,  10,  10, -10,
+   -10,   5,   0,   0,   0,   0,   5, -10,
+   -20, -10, -10, -10, -10, -10, -10, -20,
+]
+
+ROOK_TABLE = [
+     0,   0,   0,   0,   0,   0,   0,   0,
+     5,  10,  10,  10,  10,  10,  10,   5,
+    -5,   0,   0,   0,   0,   0,   0,  -5,
+    -5,   0,   0,   0,   0,   0,   0,  -5,
+    -5,   0,   0,   0,   0,   0,   0,  -5,
+    -5,   0,   0,   0,   0,   0,   0,  -5,
+    -5,   0,   0,   0,   0,   0,   0,  -5,
+     0,   0,   0,   5,   5,   0,   0,   0,
+]
+
+QUEEN_TABLE = [
+   -20, -10, -10,  -5,  -5, -10, -10, -20,
+   -10,   0,   0,   0,   0,   0,   0, -10,
+   -10,   0,   5,   5,   5,   5,   0, -10,
+    -5,   0,   5,   5,   5,   5,   0,  -5,
+     0,   0,   5,   5,   5,   5,   0,  -5,
+   -10,   5,   5,   5,   5,   5,   0, -10,
+   -10,   0,   5,   0,   0,   0,   0, -10,
+   -20, -10, -10,  -5,  -5, -10, -10, -20,
+]
+
+KING_TABLE = [
+   -30, -40, -40, -50, -50, -40, -40, -30,
+   -30, -40, -40, -50, -50, -40, -40, -30,
+   -30, -40, -40, -50, -50, -40, -40, -30,
+   -30, -40, -40, -50, -50, -40, -40, -30,
+   -20, -30, -30, -40, -40, -30, -30, -20,
+   -10, -20, -20, -20, -20, -20, -20, -10,
+    20,  20,   0,   0,   0,   0,  20,  20,
+    20,  30,  10,   0,   0,  10,  30,  20,
+]
+
+PIECE_TABLES = [None, PAWN_TABLE, KNIGHT_TABLE, BISHOP_TABLE, ROOK_TABLE, QUEEN_TABLE, KING_TABLE]
+
+
+def _build_square_scores():
+    # SQUARE_SCORES[color][piece_type][square] = material + table bonus,
+    # positive for White and negative for Black
+    scores = [[None] * 7, [None] * 7]
+    for piece_type in ch.PIECE_TYPES:
+        table = PIECE_TABLES[piece_type]
+        value = PIECE_VALUES[piece_type]
+        # The tables list rank 8 first, so White squares are mirrored vertically
+        scores[ch.WHITE][piece_type] = [value + table[square ^ 56] for square in ch.SQUARES]
+        scores[ch.BLACK][piece_type] = [-(value + table[square]) for square in ch.SQUARES]
+    return scores
+
+
+SQUARE_SCORES = _build_square_scores()
+
+
+def full_score(board):
+    """Material + piece-square score from White's point of view, computed from the bitboards"""
+    score = 0
+    for color in ch.COLORS:
+        for piece_type in ch.PIECE_TYPES:
+            table = SQUARE_SCORES[color][piece_type]
+            for square in ch.scan_forward(board.pieces_mask(piece_type, color)):
+                score += table[square]
+    return score
+
+
+def move_delta(board, move):
+    """Score change (White's point of view) of playing move on board, before it is pushed"""
+    # Null move
+    if not move:
+        return 0
+
+    color = board.turn
+    tables = SQUARE_SCORES[color]
+    from_square = move.from_square
+    to_square = move.to_square
+    piece_type = board.piece_type_at(from_square)
+
+    if piece_type == ch.KING and board.is_castling(move):
+        rank = from_square & 56
+        kingside = board.is_kingside_castling(move)
+        king_to = rank + 6 if kingside else rank + 2
+        rook_to = rank + 5 if kingside else rank + 3
+        if board.occupied_co[color] & ch.BB_SQUARES[to_square]:
+            rook_from = to_square  # Chess960 notation: king takes own rook
+        else:
+            rook_from = rank + 7 if kingside else rank
+        king_table = tables[ch.KING]
+        rook_table = tables[ch.ROOK]
+        return (king_table[king_to] - king_table[from_square]
+                + rook_table[rook_to] - rook_table[rook_from])
+
+    if move.promotion:
+        delta = tables[move.promotion][to_square] - tables[ch.PAWN][from_square]
+    else:
+        table = tables[piece_type]
+        delta = table[to_square] - table[from_square]
+
+    captured = board.piece_type_at(to_square)
+    if captured:
+        delta -= SQUARE_SCORES[not color][captured][to_square]
+    elif piece_type == ch.PAWN and to_square == board.ep_square:
+        # En passant: the captured pawn is behind the target square
+        captured_square = to_square - 8 if color == ch.WHITE else to_square + 8
+        delta -= SQUARE_SCORES[not color][ch.PAWN][captured_square]
+    return delta
+
+
+class Evaluator:
+    """Running material + piece-square score, updated in O(1) per move.
+
+    Call reset() with the root position, then push()/pop() alongside
+    board.push()/board.pop() during the search.
+    """
+
+    def __init__(self):
+        self.score = 0
+        self.stack = []
+
+    def reset(self, board):
+        self.score = full_score(board)
+        self.stack = []
+
+    def push(self, board, move):
+        """Update the score for move; call before board.push(move)"""
+        self.stack.append(self.score)
+        self.score += move_delta(board, move)
+
+    def pop(self):
+        """Undo the last push(); call together with board.pop()"""
+        self.score = self.stack.pop()
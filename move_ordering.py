@@ -0,0 +1,191 @@
+import chess as ch
+
+# Piece values used to rank captures (most valuable victim, least valuable attacker)
+ORDER_VALUES = [0, 1, 3, 3, 5, 9, 20]  # indexed by piece type, 0 = no piece
+
+# Ordering scores of the move classes, from first to last searched
+TT_MOVE_SCORE = 1000000
+CAPTURE_SCORE = 100000
+PROMOTION_SCORE = 90000
+KILLER_SCORE = 80000
+HISTORY_LIMIT = 50000  # history scores are kept below the killer scores
+
+MAX_PLY = 128
+
+# Centipawn values for static exchange evaluation
+SEE_VALUES = [0, 100, 300, 300, 500, 900, 20000]
+
+
+def attackers_to(board, square, occupied):
+    """Pieces of both colors attacking square, given the occupied squares (for x-rays)"""
+    queens_and_rooks = board.queens | board.rooks
+    queens_and_bishops = board.queens | board.bishops
+    attackers = (
+        (ch.BB_KING_ATTACKS[square] & board.kings)
+        | (ch.BB_KNIGHT_ATTACKS[square] & board.knights)
+        | (ch.BB_RANK_ATTACKS[square][ch.BB_RANK_MASKS[square] & occupied] & queens_and_rooks)
+        | (ch.BB_FILE_ATTACKS[square][ch.BB_FILE_MASKS[square] & occupied] & queens_and_rooks)
+        | (ch.BB_DIAG_ATTACKS[square][ch.BB_DIAG_MASKS[square] & occupied] & queens_and_bishops)
+        | (ch.BB_PAWN_ATTACKS[ch.BLACK][square] & board.pawns & board.occupied_co[ch.WHITE])
+        | (ch.BB_PAWN_ATTACKS[ch.WHITE][square] & board.pawns & board.occupied_co[ch.BLACK]))
+    return attackers & occupied
+
+
+def static_exchange(board, move):
+    """Material balance (centipawns) of the capture sequence started by move on its target square.
+
+    Only the sign is reliable: the sequence is cut short as soon as neither
+    side can turn the balance around, so a winning capture may report more
+    than it wins (knight takes a pawn-defended rook: 500, not 200). Use it
+    as a test (static_exchange(board, move) < 0), not as a gain.
+    """
+    from_square = move.from_square
+    to_square = move.to_square
+    occupied = board.occupied ^ ch.BB_SQUARES[from_square]
+
+    victim = board.piece_type_at(to_square)
+    if victim is None:
+        if board.piece_type_at(from_square) == ch.PAWN and to_square == board.ep_square:
+            victim = ch.PAWN
+            occupied ^= ch.BB_SQUARES[to_square - 8 if board.turn == ch.WHITE else to_square + 8]
+        else:
+            victim = 0
+
+    gains = [SEE_VALUES[victim]]
+    attacker_value = SEE_VALUES[move.promotion or board.piece_type_at(from_square)]
+    side = not board.turn
+    while True:
+        # Speculative gain if the piece that just captured is taken in turn
+        gains.append(attacker_value - gains[-1])
+        if max(-gains[-2], gains[-1]) < 0:
+            break  # neither side can profit from continuing
+        attackers = attackers_to(board, to_square, occupied) & board.occupied_co[side]
+        if not attackers:
+            break
+        # Recapture with the least valuable piece
+        for piece_type in ch.PIECE_TYPES:
+            candidates = attackers & board.pieces_mask(piece_type, side)
+            if candidates:
+                break
+        attacker_value = SEE_VALUES[piece_type]
+        occupied ^= ch.BB_SQUARES[ch.lsb(candidates)]
+        side = not side
+
+    # Each side may stop capturing when that is better for it
+    # (the last, speculative gain is not part of the sequence)
+    for i in range(len(gains) - 2, 0, -1):
+        gains[i - 1] = -max(-gains[i - 1], gains[i])
+    return gains[0]
+
+
+class MoveOrderer:
+    """Plain move ordering: hash/PV move first, then generator order.
+
+    This is the interface the engine uses; subclasses rank the other moves.
+    """
+
+    def clear(self):
+        """Forget everything learned in previous searches"""
+        pass
+
+    def age(self):
+        """Called before every search: keep what is still useful from the previous one"""
+        pass
+
+    def order_moves(self, board, moves, ply, tt_move=None):
+        """Return the moves in the order they should be searched"""
+        if tt_move is not None and tt_move in moves:
+            moves.remove(tt_move)
+            moves.insert(0, tt_move)
+        return moves
+
+    def record_cutoff(self, board, move, ply, depth):
+        """Called when move (played from board) caused a beta cutoff"""
+        pass
+
+
+class HeuristicMoveOrderer(MoveOrderer):
+    """Hash move, MVV-LVA captures, promotions, killer moves, history heuristic"""
+
+    def __init__(self):
+        self.killers = [[None, None] for _ in range(MAX_PLY)]
+        # history[color * 4096 + from * 64 + to]
+        self.history = [0] * (2 * 64 * 64)
+
+    def clear(self):
+        self.killers = [[None, None] for _ in range(MAX_PLY)]
+        self.history = [0] * (2 * 64 * 64)
+
+    def age(self):
+        # Killers are stored by distance from the root, which changes with every
+        # move; history scores stay meaningful but count less than new cutoffs
+        self.killers = [[None, None] for _ in range(MAX_PLY)]
+        self.history = [value // 2 for value in self.history]
+
+    def order_moves(self, board, moves, ply, tt_move=None):
+        killers = self.killers[ply] if ply < MAX_PLY else (None, None)
+        history = self.history
+        color_offset = 0 if board.turn == ch.WHITE else 4096
+        enemies = board.occupied_co[not board.turn]
+        piece_type_at = board.piece_type_at
+        ep_square = board.ep_square
+
+        def score(move):
+            if move == tt_move:
+                return TT_MOVE_SCORE
+            to_square = move.to_square
+            if enemies & ch.BB_SQUARES[to_square]:
+                victim = piece_type_at(to_square)
+                attacker = piece_type_at(move.from_square)
+                return CAPTURE_SCORE + ORDER_VALUES[victim] * 100 - ORDER_VALUES[attacker] + (move.promotion or 0)
+            if to_square == ep_square and piece_type_at(move.from_square) == ch.PAWN:
+                return CAPTURE_SCORE + ORDER_VALUES[ch.PAWN] * 100 - ORDER_VALUES[ch.PAWN]
+            if move.promotion:
+                return PROMOTION_SCORE + move.promotion
+            if move == killers[0]:
+                return KILLER_SCORE + 1
+            if move == killers[1]:
+                return KILLER_SCORE
+            return history[color_offset + move.from_square * 64 + to_square]
+
+        moves.sort(key=score, reverse=True)
+        return moves
+
+    def record_cutoff(self, board, move, ply, depth):
+        # Only quiet moves are remembered, captures are already searched early
+        if board.is_capture(move) or move.promotion:
+            return
+
+        if ply < MAX_PLY:
+            killers = self.killers[ply]
+            if killers[0] != move:
+                killers[1] = killers[0]
+                killers[0] = move
+
+        index = (0 if board.turn == ch.WHITE else 4096) + move.from_square * 64 + move.to_square
+        self.history[index] += depth * depth
+        if self.history[index] >= HISTORY_LIMIT:
+            # Age all entries so the scores stay below the killer moves
+            self.history = [value // 2 for value in self.history]
+
+
+if __name__ == "__main__":
+    # Compare the search effort with and without move ordering
+    import sys
+    from ChessEngine import Engine
+
+    depth = int(sys.argv[1]) if len(sys.argv) > 1 else 4
+    positions = [
+        ch.STARTING_FEN,
+        "r1bqkbnr/pppp1ppp/2n5/4p3/4P3/5N2/PPPP1PPP/RNBQKB1R w KQkq - 2 3",
+        "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1",
+    ]
+    for fen in positions:
+        print(fen)
+        for name, orderer in (("unordered", MoveOrderer()), ("ordered", HeuristicMoveOrderer())):
+            board = ch.Board(fen)
+            engine = Engine(board, depth, board.turn, orderer=orderer, jitter=0)
+            move = engine.getBestMove()
+            stats = engine.searchStats()
+            print(f"  {name:10} move {move}  nodes {stats['nodes']:8}  "
+                  f"first-move cutoffs {stats['firstMoveCutoffRate']:.1%}")
@@ -0,0 +1,32 @@
+import random
+
+import chess.polyglot
+
+
+class OpeningBook:
+    """Polyglot (.bin) opening book.
+
+    The file is memory-mapped and looked up by binary search on the Zobrist
+    key of the position (chess.polyglot does both), so opening the book is
+    instant regardless of its size.
+    """
+
+    def __init__(self, path, seed=None):
+        self.path = path
+        self.reader = chess.polyglot.open_reader(path)
+        self.random = random.Random(seed)
+        self.hits = 0
+        self.misses = 0
+
+    def choose_move(self, board):
+        """Pick a book move, weighted by the book's move weights (None if out of book)"""
+        try:
+            entry = self.reader.weighted_choice(board, random=self.random)
+        except IndexError:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return entry.move
+
+    def close(self):
+        self.reader.close()
@@ -0,0 +1,165 @@
+"""Perft: move generation correctness and throughput.
+
+Counts the leaf nodes of the legal move tree on the standard perft
+positions, checks them against the published counts and reports leaf
+nodes per second. Every leaf is generated, made and unmade, so the speed
+is that of move generation plus push/pop; --bulk only counts the moves
+of the last ply instead (faster, but it tests less). --divide prints the
+count below every root move, which narrows a wrong total down to the
+move (and, repeated from the position after it, the line) where the
+generator goes astray.
+
+    python perft.py --depth 4
+    python perft.py --position kiwipete --depth 3 --divide
+    python perft.py --fen "<FEN>" --depth 2 --divide --backend board
+    python perft.py --depth 5 --bulk
+"""
+import argparse
+import json
+import platform
+import sys
+import time
+
+import chess as ch
+
+import position
+
+# (name, FEN, known leaf counts for depth 1, 2, ...)
+PERFT_POSITIONS = [
+    ("start", ch.STARTING_FEN,
+     [20, 400, 8902, 197281, 4865609, 119060324]),
+    ("kiwipete", "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1",
+     [48, 2039, 97862, 4085603, 193690690]),
+    ("position3", "8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1",
+     [14, 191, 2812, 43238, 674624, 11030083]),
+    ("position4", "r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 w kq - 0 1",
+     [6, 264, 9467, 422333, 15833292]),
+    ("position4-mirrored", "r2q1rk1/pP1p2pp/Q4n2/bbp1p3/Np6/1B3NBn/pPPP1PPP/R3K2R b KQ - 0 1",
+     [6, 264, 9467, 422333, 15833292]),
+    ("position5", "rnbq1k1r/pp1Pbppp/2p5/8/2B5/8/PPP1NnPP/RNBQK2R w KQ - 1 8",
+     [44, 1486, 62379, 2103487, 89941194]),
+    ("position6", "r4rk1/1pp1qppp/p1np1n2/2b1p1B1/2B1P1b1/P1NP1N2/1PP1QPPP/R4RK1 w - - 0 10",
+     [46, 2079, 89890, 3894594, 164075551]),
+]
+
+
+def board_perft(board, depth, bulk=False):
+    """perft on a chess.Board, the reference the engine's Position is held to"""
+    if depth == 0:
+        return 1
+    if bulk and depth == 1:
+        return board.legal_moves.count()
+    nodes = 0
+    for move in board.legal_moves:
+        board.push(move)
+        nodes += board_perft(board, depth - 1, bulk)
+        board.pop()
+    return nodes
+
+
+# Backend name -> (board from a FEN, legal moves, perft(board, depth, bulk))
+BACKENDS = {
+    'position': (lambda fen: position.Position(ch.Board(fen)),
+                 lambda board: list(board.generate_legal_moves()),
+                 position.perft),
+    'board': (ch.Board,
+              lambda board: list(board.legal_moves),
+              board_perft),
+}
+
+
+def divide(board, depth, backend='position', bulk=False):
+    """Leaf counts of the perft tree below each root move, as [(uci, nodes)]"""
+    _, legal_moves, perft = BACKENDS[backend]
+    counts = []
+    for move in legal_moves(board):
+        board.push(move)
+        counts.append((move.uci(), perft(board, depth - 1, bulk)))
+        board.pop()
+    return sorted(counts)
+
+
+def run_position(name, fen, depth, backend='position', expected=None, show_divide=False, bulk=False, log=print):
+    make_board, _, perft = BACKENDS[backend]
+    board = make_board(fen)
+    start = time.perf_counter()
+    if show_divide and depth > 0:
+        counts = divide(board, depth, backend, bulk)
+        nodes = sum(count for _, count in counts)
+    else:
+        counts = None
+        nodes = perft(board, depth, bulk)
+    elapsed = time.perf_counter() - start
+
+    result = {
+        'name': name,
+        'fen': fen,
+        'depth': depth,
+        'nodes': nodes,
+        'expected': expected,
+        'ok': None if expected is None else nodes == expected,
+        'time': round(elapsed, 4),
+        'nps': round(nodes / elapsed) if elapsed > 0 else 0,
+    }
+    if counts is not None:
+        result['divide'] = dict(counts)
+    if log:
+        if counts is not None:
+            for uci, count in counts:
+                log(f"  {uci}: {count}")
+        status = {None: "", True: "ok", False: f"FAILED (expected {expected})"}[result['ok']]
+        log(f"{name:18} depth {depth}  nodes {nodes:10}  {result['nps']:8} nps  "
+            f"{result['time']:8.3f} s  {status}")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Count perft leaf nodes and check them against known values")
+    parser.add_argument("--depth", type=int, default=3, help="perft depth in plies (default 3)")
+    parser.add_argument("--position", action="append",
+                        choices=[name for name, _, _ in PERFT_POSITIONS],
+                        help="only run this standard position (repeatable)")
+    parser.add_argument("--fen", help="run this position instead (no known count to check)")
+    parser.add_argument("--divide", action="store_true", help="print the count below every root move")
+    parser.add_argument("--backend", choices=sorted(BACKENDS), default='position',
+                        help="move generator: the engine's Position (default) or chess.Board")
+    parser.add_argument("--bulk", action="store_true",
+                        help="count the moves of the last ply instead of making them (faster, tests less)")
+    parser.add_argument("--output", help="write the results as JSON to this file")
+    args = parser.parse_args()
+
+    if args.fen:
+        jobs = [("fen", args.fen, None)]
+    else:
+        jobs = [(name, fen, counts[args.depth - 1] if 0 < args.depth <= len(counts) else None)
+                for name, fen, counts in PERFT_POSITIONS
+                if not args.position or name in args.position]
+
+    results = [run_position(name, fen, args.depth, args.backend, expected, args.divide, args.bulk)
+               for name, fen, expected in jobs]
+    nodes = sum(result['nodes'] for result in results)
+    seconds = sum(result['time'] for result in results)
+    failed = [result['name'] for result in results if result['ok'] is False]
+    print(f"total: {nodes} nodes in {seconds:.3f} s ({round(nodes / seconds) if seconds > 0 else 0} nps)")
+    if failed:
+        print(f"node count mismatch: {', '.join(failed)}")
+
+    if args.output:
+        report = {
+            'date': time.strftime("%Y-%m-%d %H:%M:%S"),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'backend': args.backend,
+            'bulk': args.bulk,
+            'depth': args.depth,
+            'positions': results,
+        }
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"results written to {args.output}")
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,594 @@
+import chess as ch
+import chess.polyglot
+
+# Polyglot Zobrist numbers, so Position.key equals chess.polyglot.zobrist_hash()
+# ZOBRIST_PIECES[color][piece_type][square] (color False = black, True = white)
+ZOBRIST_PIECES = [
+    [[0] * 64] + [[chess.polyglot.POLYGLOT_RANDOM_ARRAY[64 * ((piece_type - 1) * 2 + color) + square]
+                   for square in ch.SQUARES]
+                  for piece_type in ch.PIECE_TYPES]
+    for color in (0, 1)]
+ZOBRIST_CASTLING = [(ch.H1, chess.polyglot.POLYGLOT_RANDOM_ARRAY[768]),
+                    (ch.A1, chess.polyglot.POLYGLOT_RANDOM_ARRAY[769]),
+                    (ch.H8, chess.polyglot.POLYGLOT_RANDOM_ARRAY[770]),
+                    (ch.A8, chess.polyglot.POLYGLOT_RANDOM_ARRAY[771])]
+ZOBRIST_EP = chess.polyglot.POLYGLOT_RANDOM_ARRAY[772:780]
+ZOBRIST_TURN = chess.polyglot.POLYGLOT_RANDOM_ARRAY[780]
+
+BB_SQUARES = ch.BB_SQUARES
+BB_ALL = ch.BB_ALL
+BB_PAWN_ATTACKS = ch.BB_PAWN_ATTACKS
+BB_KNIGHT_ATTACKS = ch.BB_KNIGHT_ATTACKS
+BB_KING_ATTACKS = ch.BB_KING_ATTACKS
+BB_RANK_ATTACKS = ch.BB_RANK_ATTACKS
+BB_FILE_ATTACKS = ch.BB_FILE_ATTACKS
+BB_DIAG_ATTACKS = ch.BB_DIAG_ATTACKS
+BB_RANK_MASKS = ch.BB_RANK_MASKS
+BB_FILE_MASKS = ch.BB_FILE_MASKS
+BB_DIAG_MASKS = ch.BB_DIAG_MASKS
+BB_BACKRANKS = ch.BB_RANK_1 | ch.BB_RANK_8
+PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING = ch.PAWN, ch.KNIGHT, ch.BISHOP, ch.ROOK, ch.QUEEN, ch.KING
+WHITE, BLACK = ch.WHITE, ch.BLACK
+Move = ch.Move
+scan_reversed = ch.scan_reversed
+msb = ch.msb
+
+
+def castling_key(castling_rights):
+    key = 0
+    for square, value in ZOBRIST_CASTLING:
+        if castling_rights & BB_SQUARES[square]:
+            key ^= value
+    return key
+
+
+class Position:
+    """Lean board for the search: integer bitboards, a square -> piece type
+    array and an incrementally updated Zobrist key.
+
+    It offers the part of the chess.Board interface the engine uses (move
+    generation, push/pop, check tests, piece lookups) and generates moves in
+    the same order, but keeps no history beyond what pop() needs. Standard
+    chess only. Build it from a chess.Board with Position(board) and go back
+    with to_board().
+    """
+
+    __slots__ = ('pieces', 'occupied_co', 'occupied', 'squares', 'turn', 'castling_rights',
+                 'ep_square', 'halfmove_clock', 'fullmove_number', 'key', 'move_stack', '_stack')
+
+    def __init__(self, board):
+        if board.chess960:
+            raise ValueError("Position only supports standard chess")
+        # pieces[piece_type], occupied_co[color] (indexed like chess.Board)
+        self.pieces = [0, board.pawns, board.knights, board.bishops, board.rooks, board.queens, board.kings]
+        self.occupied_co = [board.occupied_co[BLACK], board.occupied_co[WHITE]]
+        self.occupied = board.occupied
+        self.squares = [board.piece_type_at(square) or 0 for square in ch.SQUARES]
+        self.turn = board.turn
+        self.castling_rights = board.clean_castling_rights()
+        self.ep_square = board.ep_square
+        self.halfmove_clock = board.halfmove_clock
+        self.fullmove_number = board.fullmove_number
+        self.key = chess.polyglot.zobrist_hash(board)
+        self.move_stack = []
+        self._stack = []
+
+    def to_board(self):
+        """The current position as a chess.Board (without the move history)"""
+        board = ch.Board(None)
+        for square in scan_reversed(self.occupied):
+            board.set_piece_at(square, ch.Piece(self.squares[square],
+                                                bool(self.occupied_co[WHITE] & BB_SQUARES[square])))
+        board.turn = self.turn
+        board.castling_rights = self.castling_rights
+        board.ep_square = self.ep_square
+        board.halfmove_clock = self.halfmove_clock
+        board.fullmove_number = self.fullmove_number
+        return board
+
+    @property
+    def pawns(self):
+        return self.pieces[PAWN]
+
+    @property
+    def knights(self):
+        return self.pieces[KNIGHT]
+
+    @property
+    def bishops(self):
+        return self.pieces[BISHOP]
+
+    @property
+    def rooks(self):
+        return self.pieces[ROOK]
+
+    @property
+    def queens(self):
+        return self.pieces[QUEEN]
+
+    @property
+    def kings(self):
+        return self.pieces[KING]
+
+    def pieces_mask(self, piece_type, color):
+        return self.pieces[piece_type] & self.occupied_co[color]
+
+    def piece_type_at(self, square):
+        return self.squares[square] or None
+
+    def king(self, color):
+        king_mask = self.pieces[KING] & self.occupied_co[color]
+        return msb(king_mask) if king_mask else None
+
+    # Attacks
+
+    def attacks_mask(self, square):
+        piece_type = self.squares[square]
+        if piece_type == KNIGHT:
+            return BB_KNIGHT_ATTACKS[square]
+        if piece_type == PAWN:
+            return BB_PAWN_ATTACKS[bool(BB_SQUARES[square] & self.occupied_co[WHITE])][square]
+        if piece_type == KING:
+            return BB_KING_ATTACKS[square]
+        occupied = self.occupied
+        attacks = 0
+        if piece_type != ROOK:
+            attacks = BB_DIAG_ATTACKS[square][BB_DIAG_MASKS[square] & occupied]
+        if piece_type != BISHOP:
+            attacks |= (BB_RANK_ATTACKS[square][BB_RANK_MASKS[square] & occupied]
+                        | BB_FILE_ATTACKS[square][BB_FILE_MASKS[square] & occupied])
+        return attacks
+
+    def attackers_mask(self, color, square, occupied=None):
+        if occupied is None:
+            occupied = self.occupied
+        pieces = self.pieces
+        queens_and_rooks = pieces[QUEEN] | pieces[ROOK]
+        queens_and_bishops = pieces[QUEEN] | pieces[BISHOP]
+        attackers = (
+            (BB_KING_ATTACKS[square] & pieces[KING])
+            | (BB_KNIGHT_ATTACKS[square] & pieces[KNIGHT])
+            | (BB_RANK_ATTACKS[square][BB_RANK_MASKS[square] & occupied] & queens_and_rooks)
+            | (BB_FILE_ATTACKS[square][BB_FILE_MASKS[square] & occupied] & queens_and_rooks)
+            | (BB_DIAG_ATTACKS[square][BB_DIAG_MASKS[square] & occupied] & queens_and_bishops)
+            | (BB_PAWN_ATTACKS[not color][square] & pieces[PAWN]))
+        return attackers & self.occupied_co[color]
+
+    def is_attacked_by(self, color, square):
+        return bool(self.attackers_mask(color, square))
+
+    def is_check(self):
+        king = self.king(self.turn)
+        return king is not None and bool(self.attackers_mask(not self.turn, king))
+
+    def was_into_check(self):
+        """True if the side that just moved left its king in check"""
+        king = self.king(not self.turn)
+        return king is not None and bool(self.attackers_mask(self.turn, king))
+
+    def gives_check(self, move):
+        self.push(move)
+        try:
+            return self.is_check()
+        finally:
+            self.pop()
+
+    # Move properties
+
+    def is_en_passant(self, move):
+        return (self.ep_square == move.to_square
+                and self.squares[move.from_square] == PAWN
+                and abs(move.to_square - move.from_square) in (7, 9)
+                and not self.occupied & BB_SQUARES[move.to_square])
+
+    def is_capture(self, move):
+        return bool(BB_SQUARES[move.to_square] & self.occupied_co[not self.turn]) or self.is_en_passant(move)
+
+    def is_zeroing(self, move):
+        return self.squares[move.from_square] == PAWN or bool(BB_SQUARES[move.to_square] & self.occupied_co[not self.turn])
+
+    def is_castling(self, move):
+        return (self.squares[move.from_square] == KING
+                and abs((move.from_square & 7) - (move.to_square & 7)) > 1)
+
+    def is_kingside_castling(self, move):
+        return self.is_castling(move) and move.to_square > move.from_square
+
+    # Move generation (same moves, in the same order, as chess.Board)
+
+    def generate_pseudo_legal_moves(self, from_mask=BB_ALL, to_mask=BB_ALL):
+        turn = self.turn
+        our_pieces = self.occupied_co[turn]
+        occupied = self.occupied
+        pawn_mask = self.pieces[PAWN]
+
+        # Piece moves
+        attacks_mask = self.attacks_mask
+        for from_square in scan_reversed(our_pieces & ~pawn_mask & from_mask):
+            for to_square in scan_reversed(attacks_mask(from_square) & ~our_pieces & to_mask):
+                yield Move(from_square, to_square)
+
+        # Castling
+        if from_mask & self.pieces[KING]:
+            yield from self.generate_castling_moves(from_mask, to_mask)
+
+        pawns = pawn_mask & our_pieces & from_mask
+        if not pawns:
+            return
+
+        # Pawn captures
+        targets_mask = self.occupied_co[not turn] & to_mask
+        for from_square in scan_reversed(pawns):
+            for to_square in scan_reversed(BB_PAWN_ATTACKS[turn][from_square] & targets_mask):
+                if BB_SQUARES[to_square] & BB_BACKRANKS:
+                    yield Move(from_square, to_square, QUEEN)
+                    yield Move(from_square, to_square, ROOK)
+                    yield Move(from_square, to_square, BISHOP)
+                    yield Move(from_square, to_square, KNIGHT)
+                else:
+                    yield Move(from_square, to_square)
+
+        # Pawn advances
+        if turn == WHITE:
+            single_moves = pawns << 8 & ~occupied
+            double_moves = single_moves << 8 & ~occupied & ch.BB_RANK_4
+            back = -8
+        else:
+            single_moves = pawns >> 8 & ~occupied
+            double_moves = single_moves >> 8 & ~occupied & ch.BB_RANK_5
+            back = 8
+
+        for to_square in scan_reversed(single_moves & to_mask):
+            from_square = to_square + back
+            if BB_SQUARES[to_square] & BB_BACKRANKS:
+                yield Move(from_square, to_square, QUEEN)
+                yield Move(from_square, to_square, ROOK)
+                yield Move(from_square, to_square, BISHOP)
+                yield Move(from_square, to_square, KNIGHT)
+            else:
+                yield Move(from_square, to_square)
+
+        for to_square in scan_reversed(double_moves & to_mask):
+            yield Move(to_square + 2 * back, to_square)
+
+        if self.ep_square is not None:
+            yield from self.generate_pseudo_legal_ep(from_mask, to_mask)
+
+    def generate_pseudo_legal_ep(self, from_mask=BB_ALL, to_mask=BB_ALL):
+        ep_square = self.ep_square
+        if ep_square is None or not BB_SQUARES[ep_square] & to_mask or BB_SQUARES[ep_square] & self.occupied:
+            return
+        capturers = (self.pieces[PAWN] & self.occupied_co[self.turn] & from_mask
+                     & BB_PAWN_ATTACKS[not self.turn][ep_square] & ch.BB_RANKS[4 if self.turn else 3])
+        for capturer in scan_reversed(capturers):
+            yield Move(capturer, ep_square)
+
+    def generate_pseudo_legal_captures(self, from_mask=BB_ALL, to_mask=BB_ALL):
+        yield from self.generate_pseudo_legal_moves(from_mask, to_mask & self.occupied_co[not self.turn])
+        yield from self.generate_pseudo_legal_ep(from_mask, to_mask)
+
+    def generate_castling_moves(self, from_mask=BB_ALL, to_mask=BB_ALL):
+        backrank = ch.BB_RANK_1 if self.turn == WHITE else ch.BB_RANK_8
+        king = self.occupied_co[self.turn] & self.pieces[KING] & backrank & from_mask
+        if not king:
+            return
+        king_square = msb(king)
+        occupied = self.occupied
+
+        # Castling rights are given by rook squares (the king is on e1/e8)
+        for candidate in scan_reversed(self.castling_rights & backrank & to_mask):
+            rook = BB_SQUARES[candidate]
+            a_side = rook < king
+            king_to = king_square - 2 if a_side else king_square + 2
+            rook_to = king_square - 1 if a_side else king_square + 1
+            king_to_bb = BB_SQUARES[king_to]
+            rook_to_bb = BB_SQUARES[rook_to]
+            king_path = ch.between(king_square, king_to)
+            rook_path = ch.between(candidate, rook_to)
+
+            if not ((occupied ^ king ^ rook) & (king_path | rook_path | king_to_bb | rook_to_bb)
+                    or self._attacked_for_king(king_path | king, occupied ^ king)
+                    or self._attacked_for_king(king_to_bb, occupied ^ king ^ rook ^ rook_to_bb)):
+                yield Move(king_square, king_to)
+
+    def _attacked_for_king(self, path, occupied):
+        return any(self.attackers_mask(not self.turn, square, occupied) for square in scan_reversed(path))
+
+    def generate_legal_moves(self, from_mask=BB_ALL, to_mask=BB_ALL):
+        king = self.king(self.turn)
+        if king is None:
+            yield from self.generate_pseudo_legal_moves(from_mask, to_mask)
+            return
+        blockers = self._slider_blockers(king)
+        checkers = self.attackers_mask(not self.turn, king)
+        if checkers:
+            moves = self._generate_evasions(king, checkers, from_mask, to_mask)
+        else:
+            moves = self.generate_pseudo_legal_moves(from_mask, to_mask)
+        for move in moves:
+            if self._is_safe(king, blockers, move):
+                yield move
+
+    def legal_move_count(self):
+        """Number of legal moves, counted on the bitboards where possible"""
+        turn = self.turn
+        king = self.king(turn)
+        if king is None or self.attackers_mask(not turn, king):
+            return sum(1 for _ in self.generate_legal_moves())
+
+        pieces = self.pieces
+        ours = self.occupied_co[turn]
+        theirs = self.occupied_co[not turn]
+        occupied = self.occupied
+        blockers = self._slider_blockers(king)
+        count = 0
+
+        # Pieces: pinned ones may only move along the pin
+        for square in scan_reversed(ours & ~pieces[PAWN] & ~pieces[KING]):
+            targets = self.attacks_mask(square) & ~ours
+            if blockers & BB_SQUARES[square]:
+                targets &= ch.ray(king, square)
+            count += ch.popcount(targets)
+
+        for square in scan_reversed(BB_KING_ATTACKS[king] & ~ours):
+            if not self.attackers_mask(not turn, square):
+                count += 1
+        count += sum(1 for _ in self.generate_castling_moves())
+
+        # Unpinned pawns in bulk (a promotion counts four times)
+        pawns = pieces[PAWN] & ours
+        free = pawns & ~blockers
+        if turn == WHITE:
+            single_moves = free << 8 & ~occupied
+            double_moves = single_moves << 8 & ~occupied & ch.BB_RANK_4
+            captures = ((free & ~ch.BB_FILE_A) << 7 & theirs, (free & ~ch.BB_FILE_H) << 9 & theirs)
+        else:
+            single_moves = free >> 8 & ~occupied
+            double_moves = single_moves >> 8 & ~occupied & ch.BB_RANK_5
+            captures = ((free & ~ch.BB_FILE_A) >> 9 & theirs, (free & ~ch.BB_FILE_H) >> 7 & theirs)
+        for targets in (single_moves,) + captures:
+            count += ch.popcount(targets & ~BB_BACKRANKS) + 4 * ch.popcount(targets & BB_BACKRANKS)
+        count += ch.popcount(double_moves)
+
+        # Pinned pawns and en passant one by one
+        ep_mask = BB_SQUARES[self.ep_square] if self.ep_square is not None else 0
+        for move in self.generate_pseudo_legal_moves(pawns & blockers, ~ep_mask):
+            if self._is_safe(king, blockers, move):
+                count += 1
+        for move in self.generate_pseudo_legal_ep():
+            if self._is_safe(king, blockers, move):
+                count += 1
+        return count
+
+    def _slider_blockers(self, king):
+        """Our pieces that are the only piece between our king and an enemy slider"""
+        pieces = self.pieces
+        rooks_and_queens = pieces[ROOK] | pieces[QUEEN]
+        bishops_and_queens = pieces[BISHOP] | pieces[QUEEN]
+        snipers = ((BB_RANK_ATTACKS[king][0] & rooks_and_queens)
+                   | (BB_FILE_ATTACKS[king][0] & rooks_and_queens)
+                   | (BB_DIAG_ATTACKS[king][0] & bishops_and_queens))
+        blockers = 0
+        for sniper in scan_reversed(snipers & self.occupied_co[not self.turn]):
+            between = ch.between(king, sniper) & self.occupied
+            if between and BB_SQUARES[msb(between)] == between:
+                blockers |= between
+        return blockers & self.occupied_co[self.turn]
+
+    def _generate_evasions(self, king, checkers, from_mask=BB_ALL, to_mask=BB_ALL):
+        pieces = self.pieces
+        attacked = 0
+        for checker in scan_reversed(checkers & (pieces[BISHOP] | pieces[ROOK] | pieces[QUEEN])):
+            attacked |= ch.ray(king, checker) & ~BB_SQUARES[checker]
+
+        if BB_SQUARES[king] & from_mask:
+            for to_square in scan_reversed(BB_KING_ATTACKS[king] & ~self.occupied_co[self.turn] & ~attacked & to_mask):
+                yield Move(king, to_square)
+
+        checker = msb(checkers)
+        if BB_SQUARES[checker] == checkers:
+            # Capture or block a single checker
+            target = ch.between(king, checker) | checkers
+            yield from self.generate_pseudo_legal_moves(~pieces[KING] & from_mask, target & to_mask)
+
+            # Capture the checking pawn en passant
+            if self.ep_square is not None and not BB_SQUARES[self.ep_square] & target:
+                last_double = self.ep_square + (-8 if self.turn == WHITE else 8)
+                if last_double == checker:
+                    yield from self.generate_pseudo_legal_ep(from_mask, to_mask)
+
+    def _is_safe(self, king, blockers, move):
+        if move.from_square == king:
+            return self.is_castling(move) or not self.is_attacked_by(not self.turn, move.to_square)
+        if self.is_en_passant(move):
+            # Two pawns leave the rank at once: just try it
+            self.push(move)
+            safe = not self.was_into_check()
+            self.pop()
+            return safe
+        return (not blockers & BB_SQUARES[move.from_square]
+                or bool(ch.ray(move.from_square, move.to_square) & BB_SQUARES[king]))
+
+    # Make/unmake
+
+    def _ep_key(self):
+        # Polyglot only hashes the en passant file if a pawn could capture there
+        ep_square = self.ep_square
+        if BB_PAWN_ATTACKS[not self.turn][ep_square] & self.pieces[PAWN] & self.occupied_co[self.turn]:
+            return ZOBRIST_EP[ep_square & 7]
+        return 0
+
+    def push(self, move):
+        """Play a pseudo-legal move (or a null move)"""
+        us = self.turn
+        them = not us
+        ep_square = self.ep_square
+        castling_rights = self.castling_rights
+        key = self.key
+        if ep_square is not None:
+            key ^= self._ep_key()
+
+        if not move:
+            self._stack.append((0, 0, 0, castling_rights, ep_square, self.halfmove_clock, self.fullmove_number, self.key))
+            self.move_stack.append(move)
+            self.ep_square = None
+            self.halfmove_clock += 1
+            if us == BLACK:
+                self.fullmove_number += 1
+            self.turn = them
+            self.key = key ^ ZOBRIST_TURN
+            return
+
+        pieces = self.pieces
+        occupied_co = self.occupied_co
+        squares = self.squares
+        zobrist_us = ZOBRIST_PIECES[us]
+        from_square = move.from_square
+        to_square = move.to_square
+        from_bb = BB_SQUARES[from_square]
+        to_bb = BB_SQUARES[to_square]
+        piece_type = squares[from_square]
+        captured = squares[to_square]
+        capture_square = to_square
+        if piece_type == PAWN and to_square == ep_square and not captured:
+            # En passant: the captured pawn is behind the target square
+            capture_square = to_square - 8 if us == WHITE else to_square + 8
+            captured = PAWN
+
+        self._stack.append((piece_type, captured, capture_square, castling_rights, ep_square,
+                            self.halfmove_clock, self.fullmove_number, self.key))
+        self.move_stack.append(move)
+        self.ep_square = None
+        halfmove_clock = self.halfmove_clock + 1
+
+        # Lift the piece
+        pieces[piece_type] ^= from_bb
+        occupied_co[us] ^= from_bb
+        squares[from_square] = 0
+        key ^= zobrist_us[piece_type][from_square]
+
+        # Remove a captured piece
+        if captured:
+            capture_bb = BB_SQUARES[capture_square]
+            pieces[captured] ^= capture_bb
+            occupied_co[them] ^= capture_bb
+            squares[capture_square] = 0
+            key ^= ZOBRIST_PIECES[them][captured][capture_square]
+            halfmove_clock = 0
+
+        # Put it down (promoted if it's a promotion)
+        placed = move.promotion or piece_type
+        pieces[placed] ^= to_bb
+        occupied_co[us] ^= to_bb
+        squares[to_square] = placed
+        key ^= zobrist_us[placed][to_square]
+
+        if piece_type == PAWN:
+            halfmove_clock = 0
+            if to_square - from_square == 16:
+                self.ep_square = from_square + 8
+            elif from_square - to_square == 16:
+                self.ep_square = from_square - 8
+        elif piece_type == KING and abs(to_square - from_square) == 2:
+            # Castling: move the rook too
+            if to_square > from_square:
+                rook_from, rook_to = from_square + 3, from_square + 1
+            else:
+                rook_from, rook_to = from_square - 4, from_square - 1
+            rook_bb = BB_SQUARES[rook_from] | BB_SQUARES[rook_to]
+            pieces[ROOK] ^= rook_bb
+            occupied_co[us] ^= rook_bb
+            squares[rook_from] = 0
+            squares[rook_to] = ROOK
+            key ^= zobrist_us[ROOK][rook_from] ^ zobrist_us[ROOK][rook_to]
+
+        if castling_rights:
+            new_rights = castling_rights & ~from_bb & ~to_bb
+            if piece_type == KING:
+                new_rights &= ~(ch.BB_RANK_1 if us == WHITE else ch.BB_RANK_8)
+            if new_rights != castling_rights:
+                key ^= castling_key(castling_rights) ^ castling_key(new_rights)
+                self.castling_rights = new_rights
+
+        self.occupied = occupied_co[0] | occupied_co[1]
+        self.halfmove_clock = halfmove_clock
+        if us == BLACK:
+            self.fullmove_number += 1
+        self.turn = them
+        if self.ep_square is not None:
+            key ^= self._ep_key()
+        self.key = key ^ ZOBRIST_TURN
+
+    def pop(self):
+        """Take back the last move"""
+        move = self.move_stack.pop()
+        (piece_type, captured, capture_square, self.castling_rights, self.ep_square,
+         self.halfmove_clock, self.fullmove_number, self.key) = self._stack.pop()
+        us = self.turn = not self.turn
+        if not move:
+            return move
+
+        pieces = self.pieces
+        occupied_co = self.occupied_co
+        squares = self.squares
+        from_square = move.from_square
+        to_square = move.to_square
+        from_bb = BB_SQUARES[from_square]
+        to_bb = BB_SQUARES[to_square]
+
+        placed = move.promotion or piece_type
+        pieces[placed] ^= to_bb
+        occupied_co[us] ^= to_bb
+        squares[to_square] = 0
+        pieces[piece_type] ^= from_bb
+        occupied_co[us] ^= from_bb
+        squares[from_square] = piece_type
+
+        if captured:
+            capture_bb = BB_SQUARES[capture_square]
+            pieces[captured] ^= capture_bb
+            occupied_co[not us] ^= capture_bb
+            squares[capture_square] = captured
+        elif piece_type == KING and abs(to_square - from_square) == 2:
+            if to_square > from_square:
+                rook_from, rook_to = from_square + 3, from_square + 1
+            else:
+                rook_from, rook_to = from_square - 4, from_square - 1
+            rook_bb = BB_SQUARES[rook_from] | BB_SQUARES[rook_to]
+            pieces[ROOK] ^= rook_bb
+            occupied_co[us] ^= rook_bb
+            squares[rook_to] = 0
+            squares[rook_from] = ROOK
+
+        self.occupied = occupied_co[0] | occupied_co[1]
+        return move
+
+
+def perft(position, depth, bulk=False):
+    """Number of leaf nodes of the legal move tree of the given depth.
+
+    Moves are made the way the search makes them: legal evasions in check,
+    otherwise pseudo-legal moves that are taken back when they leave the
+    king in check, so every leaf is generated, pushed and popped. With
+    bulk=True the last ply is only counted (legal_move_count()), which is
+    faster but leaves push/pop and was_into_check() out of the test.
+    """
+    if depth == 0:
+        return 1
+    if bulk and depth == 1:
+        return position.legal_move_count()
+    in_check = position.is_check()
+    if in_check:
+        moves = list(position.generate_legal_moves())
+    else:
+        moves = list(position.generate_pseudo_legal_moves())
+    nodes = 0
+    for move in moves:
+        position.push(move)
+        if not in_check and position.was_into_check():
+            position.pop()
+            continue
+        nodes += perft(position, depth - 1, bulk)
+        position.pop()
+    return nodes
+
@@ -0,0 +1,97 @@
+class SearchStats:
+    """Counters collected by the engine during one getBestMove() call"""
+
+    # Cutoffs after this many moves are counted in the last bucket
+    MAX_CUTOFF_INDEX = 16
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.nodes = 0
+        self.qNodes = 0
+        self.leafEvals = 0
+        self.cutoffs = 0
+        # cutoffsByMoveIndex[i] = cutoffs caused by the (i+1)-th legal move searched
+        self.cutoffsByMoveIndex = [0] * self.MAX_CUTOFF_INDEX
+        self.ttProbes = 0
+        self.ttHits = 0
+        self.selDepth = 0
+        self.aspirationResearches = 0  # root searches repeated with a wider window
+        self.nullMoveCutoffs = 0
+        self.lmrReductions = 0
+        self.lmrResearches = 0  # reduced moves searched again at full depth
+        self.futilityPrunes = 0
+        self.reverseFutilityPrunes = 0
+        self.elapsed = 0.0
+        self.pv = []
+        self.bookMove = False  # move came from the opening book
+        self.tablebaseMove = False  # move came from the endgame tablebases
+        self.tbHits = 0  # subtrees cut off by a tablebase probe
+        self.tbNodesSaved = 0  # estimated nodes those subtrees would have cost
+        # One dict per completed iteration (see Engine.iterationInfo)
+        self.iterations = []
+
+    def recordCutoff(self, moveIndex):
+        self.cutoffs += 1
+        self.cutoffsByMoveIndex[min(moveIndex, self.MAX_CUTOFF_INDEX - 1)] += 1
+
+    @property
+    def firstMoveCutoffs(self):
+        return self.cutoffsByMoveIndex[0]
+
+    @property
+    def firstMoveCutoffRate(self):
+        return self.firstMoveCutoffs / self.cutoffs if self.cutoffs else 0.0
+
+    @property
+    def nps(self):
+        return round(self.nodes / self.elapsed) if self.elapsed > 0 else 0
+
+    def merge(self, other):
+        """Add the counters of another search (e.g. from a worker process)"""
+        self.nodes += other.nodes
+        self.qNodes += other.qNodes
+        self.leafEvals += other.leafEvals
+        self.cutoffs += other.cutoffs
+        self.cutoffsByMoveIndex = [a + b for a, b in zip(self.cutoffsByMoveIndex, other.cutoffsByMoveIndex)]
+        self.ttProbes += other.ttProbes
+        self.ttHits += other.ttHits
+        self.selDepth = max(self.selDepth, other.selDepth)
+        self.aspirationResearches += other.aspirationResearches
+        self.nullMoveCutoffs += other.nullMoveCutoffs
+        self.lmrReductions += other.lmrReductions
+        self.lmrResearches += other.lmrResearches
+        self.futilityPrunes += other.futilityPrunes
+        self.reverseFutilityPrunes += other.reverseFutilityPrunes
+        self.tbHits += other.tbHits
+        self.tbNodesSaved += other.tbNodesSaved
+
+    def as_dict(self):
+        return {
+            'nodes': self.nodes,
+            'qNodes': self.qNodes,
+            'leafEvals': self.leafEvals,
+            'cutoffs': self.cutoffs,
+            'cutoffsByMoveIndex': list(self.cutoffsByMoveIndex),
+            'firstMoveCutoffs': self.firstMoveCutoffs,
+            'firstMoveCutoffRate': self.firstMoveCutoffRate,
+            'ttProbes': self.ttProbes,
+            'ttHits': self.ttHits,
+            'selDepth': self.selDepth,
+            'aspirationResearches': self.aspirationResearches,
+            'nullMoveCutoffs': self.nullMoveCutoffs,
+            'lmrReductions': self.lmrReductions,
+            'lmrResearches': self.lmrResearches,
+            'futilityPrunes': self.futilityPrunes,
+            'reverseFutilityPrunes': self.reverseFutilityPrunes,
+            'time': round(self.elapsed, 4),
+            'nps': self.nps,
+            'pv': [move.uci() for move in self.pv],
+            'bookMove': self.bookMove,
+            'tablebaseMove': self.tablebaseMove,
+            'tbHits': self.tbHits,
+            'tbNodesSaved': self.tbNodesSaved,
+            'iterations': [dict(info, move=info['move'].uci(), pv=[move.uci() for move in info['pv']])
+                           for info in self.iterations],
+        }
@@ -0,0 +1,304 @@
+"""Engine-vs-engine self-play tournament.
+
+Plays two engine configurations against each other from a set of openings,
+each opening twice with colours swapped, on a process pool using every
+core. Reports wins/draws/losses of engine A, the Elo difference with its
+95% error margin and the average time and depth per move of both engines,
+and writes the games as PGN.
+
+    python selfplay.py --a "time=500" --b "time=500,lmr=false" --pgn games.pgn
+    python selfplay.py --a "depth=4" --b "depth=3" --games 40
+
+Engine settings are comma separated key=value pairs: depth (plies), time
+(ms per move), quiescence, checks, ordering, null_move, lmr, futility
+(true/false), book (Polyglot file), jitter (random evaluation tie-break in
+centipawns, by default 2 without a book and 0 with one) and syzygy
+(directory).
+"""
+import argparse
+import json
+import math
+import multiprocessing
+import os
+import platform
+import time
+
+import chess as ch
+import chess.pgn
+
+from ChessEngine import Engine, MAX_DEPTH
+from move_ordering import MoveOrderer
+
+# (name, moves) played before the engines take over
+OPENINGS = [
+    ("Ruy Lopez", "e2e4 e7e5 g1f3 b8c6 f1b5 a7a6"),
+    ("Italian", "e2e4 e7e5 g1f3 b8c6 f1c4 f8c5"),
+    ("Sicilian", "e2e4 c7c5 g1f3 d7d6 d2d4 c5d4 f3d4 g8f6"),
+    ("French", "e2e4 e7e6 d2d4 d7d5 b1c3 g8f6"),
+    ("Caro-Kann", "e2e4 c7c6 d2d4 d7d5 e4e5 c8f5"),
+    ("Scandinavian", "e2e4 d7d5 e4d5 d8d5 b1c3 d5a5"),
+    ("Queen's Gambit Declined", "d2d4 d7d5 c2c4 e7e6 b1c3 g8f6"),
+    ("Slav", "d2d4 d7d5 c2c4 c7c6 g1f3 g8f6"),
+    ("King's Indian", "d2d4 g8f6 c2c4 g7g6 b1c3 f8g7 e2e4 d7d6"),
+    ("Nimzo-Indian", "d2d4 g8f6 c2c4 e7e6 b1c3 f8b4"),
+    ("English", "c2c4 e7e5 b1c3 g8f6 g2g3 d7d5"),
+    ("Reti", "g1f3 d7d5 g2g3 g8f6 f1g2 e7e6"),
+]
+
+# Games still running after this many plies are adjudicated as draws
+DEFAULT_MAX_PLIES = 300
+
+# Engine settings: key -> (Engine keyword argument, parser)
+_BOOLEAN = {'true': True, 'false': False, 'yes': True, 'no': False, 'on': True, 'off': False, '1': True, '0': False}
+SETTINGS = {
+    'depth': ('maxDepth', int),
+    'time': ('timeLimit', int),
+    'quiescence': ('quiescence', _BOOLEAN.__getitem__),
+    'checks': ('quiescenceChecks', _BOOLEAN.__getitem__),
+    'ordering': ('ordering', _BOOLEAN.__getitem__),
+    'null_move': ('nullMove', _BOOLEAN.__getitem__),
+    'lmr': ('lmr', _BOOLEAN.__getitem__),
+    'futility': ('futility', _BOOLEAN.__getitem__),
+    'book': ('bookPath', str),
+    'jitter': ('jitter', int),
+    'syzygy': ('tablebasePath', str),
+}
+
+
+def parse_settings(text):
+    """Engine settings of a "key=value,key=value" string as Engine keyword arguments"""
+    options = {}
+    for item in filter(None, (part.strip() for part in text.split(","))):
+        key, _, value = item.partition("=")
+        key = key.strip().lower().replace("-", "_")
+        if key not in SETTINGS:
+            raise ValueError(f"unknown engine setting {key!r} (known: {', '.join(SETTINGS)})")
+        name, parse = SETTINGS[key]
+        try:
+            options[name] = parse(value.strip().lower() if parse is not str else value.strip())
+        except (KeyError, ValueError):
+            raise ValueError(f"bad value for {key}: {value!r}") from None
+    if 'timeLimit' not in options and 'maxDepth' not in options:
+        options['maxDepth'] = 4
+    return options
+
+
+def make_engine(board, color, options):
+    options = dict(options)
+    maxDepth = options.pop('maxDepth', MAX_DEPTH)
+    if not options.pop('ordering', True):
+        options['orderer'] = MoveOrderer()
+    return Engine(board, maxDepth, color, **options)
+
+
+def load_openings(path):
+    """Openings of a file: one FEN or one line of UCI moves per line ('#' starts a comment)"""
+    openings = []
+    with open(path) as f:
+        for number, line in enumerate(f, 1):
+            line = line.split("#", 1)[0].strip()
+            if line:
+                openings.append((f"{os.path.basename(path)}:{number}", line))
+    return openings
+
+
+def opening_board(opening):
+    """Board after an opening given as a FEN or as UCI moves from the start position"""
+    if "/" in opening:
+        return ch.Board(opening)
+    board = ch.Board()
+    for uci in opening.split():
+        board.push_uci(uci)
+    return board
+
+
+def play_game(job):
+    """Play one game; runs in a pool process. Returns the result and per-engine move statistics."""
+    round_number, opening_name, opening, white, black, names, max_plies = job
+    board = opening_board(opening)
+    start_board = board.copy()
+    engines = {
+        ch.WHITE: make_engine(board, ch.WHITE, white),
+        ch.BLACK: make_engine(board, ch.BLACK, black),
+    }
+    moves = {ch.WHITE: [], ch.BLACK: []}  # (seconds, completed depth, nodes) per move
+
+    termination = None
+    try:
+        while not board.is_game_over(claim_draw=True):
+            if board.ply() - start_board.ply() >= max_plies:
+                termination = "adjudication"
+                break
+            engine = engines[board.turn]
+            start = time.perf_counter()
+            move = engine.getBestMove()
+            elapsed = time.perf_counter() - start
+            moves[board.turn].append((elapsed, engine.completedDepth, engine.stats.nodes))
+            board.push(move)
+    finally:
+        for engine in engines.values():
+            engine.close()
+
+    if termination is None:
+        result = board.result(claim_draw=True)
+        termination = "normal"
+    else:
+        result = "1/2-1/2"
+
+    # The record starts from the standard position with the opening moves,
+    # or from the opening's FEN
+    game = chess.pgn.Game()
+    if "/" in opening:
+        game.setup(board.root())
+    node = game
+    for move in board.move_stack:
+        node = node.add_variation(move)
+    game.headers["Event"] = "Self-play"
+    game.headers["Round"] = str(round_number)
+    game.headers["White"] = names[ch.WHITE]
+    game.headers["Black"] = names[ch.BLACK]
+    game.headers["Result"] = result
+    game.headers["Opening"] = opening_name
+    game.headers["Termination"] = termination
+    game.headers["PlyCount"] = str(len(board.move_stack))
+
+    return {
+        'round': round_number,
+        'opening': opening_name,
+        'white': names[ch.WHITE],
+        'black': names[ch.BLACK],
+        'result': result,
+        'termination': termination,
+        'moves': {names[ch.WHITE]: moves[ch.WHITE], names[ch.BLACK]: moves[ch.BLACK]},
+        'pgn': str(game),
+    }
+
+
+def elo_difference(wins, draws, losses):
+    """Elo difference of a W/D/L record and its 95% error margin (None when undefined)"""
+    games = wins + draws + losses
+    if games == 0:
+        return None, None
+    score = (wins + draws / 2) / games
+    if score in (0, 1):
+        return (float("inf") if score == 1 else float("-inf")), None
+
+    def elo(s):
+        return -400 * math.log10(1 / s - 1)
+
+    # Standard error of the mean game score
+    variance = (wins * (1 - score) ** 2 + draws * (0.5 - score) ** 2 + losses * score ** 2) / games
+    margin = 1.96 * math.sqrt(variance / games)
+    low, high = max(score - margin, 1e-6), min(score + margin, 1 - 1e-6)
+    return elo(score), (elo(high) - elo(low)) / 2
+
+
+def summarize(results, name_a, name_b):
+    wins = sum(1 for r in results if (r['result'] == "1-0") == (r['white'] == name_a) and r['result'] != "1/2-1/2")
+    draws = sum(1 for r in results if r['result'] == "1/2-1/2")
+    losses = len(results) - wins - draws
+    elo, margin = elo_difference(wins, draws, losses)
+
+    engines = {}
+    for name in (name_a, name_b):
+        moves = [move for r in results for move in r['moves'][name]]
+        seconds = sum(move[0] for move in moves)
+        engines[name] = {
+            'moves': len(moves),
+            'timePerMove': round(seconds / len(moves), 4) if moves else 0,
+            'depthPerMove': round(sum(move[1] for move in moves) / len(moves), 2) if moves else 0,
+            'nps': round(sum(move[2] for move in moves) / seconds) if seconds > 0 else 0,
+        }
+    return {
+        'games': len(results),
+        'wins': wins,
+        'draws': draws,
+        'losses': losses,
+        'score': round((wins + draws / 2) / len(results), 4) if results else None,
+        'elo': None if elo is None or math.isinf(elo) else round(elo, 1),
+        'eloMargin': None if margin is None else round(margin, 1),
+        'engines': engines,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Play two engine configurations against each other")
+    parser.add_argument("--a", default="", metavar="SETTINGS",
+                        help='engine A, e.g. "time=500,lmr=false" (default depth=4)')
+    parser.add_argument("--b", default="", metavar="SETTINGS", help="engine B (same format)")
+    parser.add_argument("--name-a", default="A", help="name of engine A in the PGN (default A)")
+    parser.add_argument("--name-b", default="B", help="name of engine B in the PGN (default B)")
+    parser.add_argument("--games", type=int,
+                        help="number of games, rounded up to pairs (default two per opening)")
+    parser.add_argument("--openings", metavar="FILE",
+                        help="openings file: one FEN or line of UCI moves per line (default: built-in set)")
+    parser.add_argument("--max-plies", type=int, default=DEFAULT_MAX_PLIES,
+                        help=f"adjudicate a draw after this many plies (default {DEFAULT_MAX_PLIES})")
+    parser.add_argument("--concurrency", type=int, default=os.cpu_count() or 1,
+                        help="games played at the same time (default: number of cores)")
+    parser.add_argument("--pgn", help="write the games to this PGN file")
+    parser.add_argument("--output", help="write the results as JSON to this file")
+    args = parser.parse_args()
+
+    try:
+        settings_a, settings_b = parse_settings(args.a), parse_settings(args.b)
+    except ValueError as e:
+        parser.error(str(e))
+    if args.name_a == args.name_b:
+        parser.error("the engines need different names")
+    openings = load_openings(args.openings) if args.openings else OPENINGS
+    pairs = (args.games + 1) // 2 if args.games else len(openings)
+
+    # Every opening is played twice, A with White first
+    jobs = []
+    for pair in range(pairs):
+        name, opening = openings[pair % len(openings)]
+        jobs.append((2 * pair + 1, name, opening, settings_a, settings_b,
+                     {ch.WHITE: args.name_a, ch.BLACK: args.name_b}, args.max_plies))
+        jobs.append((2 * pair + 2, name, opening, settings_b, settings_a,
+                     {ch.WHITE: args.name_b, ch.BLACK: args.name_a}, args.max_plies))
+
+    print(f"{len(jobs)} games, {args.concurrency} at a time: {args.name_a} ({args.a or 'depth=4'}) "
+          f"vs {args.name_b} ({args.b or 'depth=4'})")
+    start = time.perf_counter()
+    results = []
+    with multiprocessing.Pool(args.concurrency) as pool:
+        for result in pool.imap_unordered(play_game, jobs):
+            results.append(result)
+            print(f"game {result['round']:3}  {result['white']} - {result['black']}  {result['result']:7}  "
+                  f"{result['opening']} ({result['termination']})")
+    elapsed = time.perf_counter() - start
+    results.sort(key=lambda r: r['round'])
+
+    summary = summarize(results, args.name_a, args.name_b)
+    elo = summary['elo']
+    elo_text = ("n/a" if summary['score'] in (0, 1, None)
+                else f"{elo:+.1f} +/- {summary['eloMargin']:.1f}")
+    print(f"{args.name_a} vs {args.name_b}: +{summary['wins']} ={summary['draws']} -{summary['losses']}  "
+          f"score {summary['score']}  Elo {elo_text}  ({elapsed:.1f} s)")
+    for name, stats in summary['engines'].items():
+        print(f"  {name}: {stats['moves']} moves, {stats['timePerMove']:.3f} s/move, "
+              f"depth {stats['depthPerMove']}, {stats['nps']} nps")
+
+    if args.pgn:
+        with open(args.pgn, 'w') as f:
+            for result in results:
+                f.write(result['pgn'] + "\n\n")
+        print(f"games written to {args.pgn}")
+
+    if args.output:
+        report = {
+            'date': time.strftime("%Y-%m-%d %H:%M:%S"),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'engines': {args.name_a: args.a, args.name_b: args.b},
+            'summary': summary,
+            'games': [{key: value for key, value in result.items() if key != 'moves'} for result in results],
+        }
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+import os
+import tkinter as tk
+
+from PIL import Image, ImageTk
+
+PIECE_KEYS = ['wk', 'wq', 'wr', 'wb', 'wn', 'wp', 'bk', 'bq', 'br', 'bb', 'bn', 'bp']
+
+# Resized images are kept here between runs, for this many square sizes
+CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "chess", "sprites")
+CACHE_SIZES = 4
+
+
+class SpriteCache:
+    """Piece images per (piece, size), rendered on first use.
+
+    A piece is only decoded and resampled the first time it is needed at
+    a size. The result is also saved as a PNG in cache_dir, which Tk loads
+    directly on the next run: PIL isn't involved at all at startup once the
+    sprites for the board size are on disk. The disk cache keeps the
+    CACHE_SIZES most recently used sizes.
+    """
+
+    def __init__(self, image_dir="images", cache_dir=CACHE_DIR):
+        self.image_dir = image_dir
+        self.cache_dir = cache_dir
+        self._photos = {}  # (key, size) -> PhotoImage
+        self._sprites = {}  # (key, size) -> PIL image
+        self._faded = {}  # (key, size, level, levels) -> PhotoImage
+        self._used_sizes = set()
+
+    def photo(self, key, size):
+        """Tk image of the piece key ('wk', 'bp', ...) size pixels wide"""
+        image = self._photos.get((key, size))
+        if image is None:
+            path = self._cache_path(key, size)
+            if path is not None and self._is_fresh(path, key):
+                image = tk.PhotoImage(file=path)
+            else:
+                image = ImageTk.PhotoImage(self.sprite(key, size))
+            self._photos[(key, size)] = image
+            self._mark_used(size)
+        return image
+
+    def sprite(self, key, size):
+        """The piece as a PIL image, resampled from the original and saved to the disk cache"""
+        sprite = self._sprites.get((key, size))
+        if sprite is None:
+            sprite = Image.open(self._source_path(key)).convert("RGBA").resize((size, size), Image.LANCZOS)
+            self._sprites[(key, size)] = sprite
+            path = self._cache_path(key, size)
+            if path is not None:
+                try:
+                    os.makedirs(self.cache_dir, exist_ok=True)
+                    sprite.save(path)
+                except OSError:
+                    pass  # no disk cache (read-only home...): render again next time
+        return sprite
+
+    def faded(self, key, size, level, levels):
+        """The piece at opacity level / levels"""
+        image = self._faded.get((key, size, level, levels))
+        if image is None:
+            sprite = self.sprite(key, size).copy()
+            sprite.putalpha(sprite.getchannel('A').point(lambda alpha: alpha * level // levels))
+            image = self._faded[(key, size, level, levels)] = ImageTk.PhotoImage(sprite)
+        return image
+
+    def _source_path(self, key):
+        return os.path.join(self.image_dir, f"{key}.png")
+
+    def _cache_path(self, key, size):
+        if self.cache_dir is None:
+            return None
+        return os.path.join(self.cache_dir, f"{key}-{size}.png")
+
+    def _is_fresh(self, path, key):
+        """The cached file exists and is newer than the original image"""
+        try:
+            return os.path.getmtime(path) >= os.path.getmtime(self._source_path(key))
+        except OSError:
+            return False
+
+    def _mark_used(self, size):
+        if size in self._used_sizes or self.cache_dir is None:
+            return
+        self._used_sizes.add(size)
+        # Keep the cache small: drop the sizes that haven't been used for longest
+        try:
+            for key in PIECE_KEYS:
+                path = self._cache_path(key, size)
+                if os.path.exists(path):
+                    os.utime(path)
+            sizes = {}
+            for name in os.listdir(self.cache_dir):
+                stem, _, size_text = name[:-len(".png")].rpartition("-")
+                if name.endswith(".png") and stem in PIECE_KEYS and size_text.isdigit():
+                    mtime = os.path.getmtime(os.path.join(self.cache_dir, name))
+                    sizes[int(size_text)] = max(mtime, sizes.get(int(size_text), 0))
+            for old in sorted(sizes, key=sizes.get, reverse=True)[CACHE_SIZES:]:
+                for key in PIECE_KEYS:
+                    path = self._cache_path(key, old)
+                    if os.path.exists(path):
+                        os.remove(path)
+        except OSError:
+            pass
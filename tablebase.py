@@ -0,0 +1,117 @@
+import collections
+
+import chess
+import chess.syzygy
+
+from transposition_table import position_key
+
+# Number of positions whose probe results are kept in memory
+DEFAULT_CACHE_SIZE = 1 << 16
+
+
+class Tablebase:
+    """Syzygy endgame tablebases (.rtbw/.rtbz files) with an LRU probe cache.
+
+    Probing a table means decompressing a block of the file, so the WDL and
+    DTZ results are cached per position (Zobrist key) and the least recently
+    used ones are dropped once the cache is full. Results are facts about the
+    position, so the cache is kept from one search to the next.
+
+    Positions with castling rights or more pieces than the largest table
+    are never probed.
+    """
+
+    def __init__(self, directory, cache_size=DEFAULT_CACHE_SIZE):
+        self.directory = directory
+        self.tables = chess.syzygy.open_tablebase(directory)
+        # A table name such as "KRPvKR" has one letter per piece plus the "v"
+        self.max_pieces = max((len(name) - 1 for name in self.tables.wdl), default=0)
+        self.cache_size = cache_size
+        self._wdl = collections.OrderedDict()
+        self._dtz = collections.OrderedDict()
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.probes = 0
+        self.cache_hits = 0
+        self.failures = 0  # missing table for the material on the board
+
+    def covers(self, board):
+        """True if the position has few enough pieces to be probed"""
+        return (chess.popcount(board.occupied) <= self.max_pieces
+                and not board.castling_rights)
+
+    def probe_wdl(self, board):
+        """Win/draw/loss for the side to move: 2 win, 1 cursed win (50-move
+        rule draw), 0 draw, -1 blessed loss, -2 loss. None if not in the tables."""
+        return self._probe(self._wdl, self.tables.get_wdl, board)
+
+    def probe_dtz(self, board):
+        """Distance to the next zeroing move (capture or pawn move), signed like
+        probe_wdl. None if not in the tables."""
+        return self._probe(self._dtz, self.tables.get_dtz, board)
+
+    def _probe(self, cache, get, board):
+        key = position_key(board)
+        self.probes += 1
+        if key in cache:
+            self.cache_hits += 1
+            cache.move_to_end(key)
+            return cache[key]
+
+        if not isinstance(board, chess.Board):
+            board = board.to_board()  # the engine's Position
+        result = get(board)
+        if result is None:
+            self.failures += 1
+        cache[key] = result
+        if len(cache) > self.cache_size:
+            cache.popitem(last=False)
+        return result
+
+    def best_move(self, board):
+        """The tablebase move at the root and its WDL for the side to move.
+
+        Prefers the best WDL; among winning moves the one resetting the
+        50-move counter soonest (mate first), among losing moves the one that
+        delays it longest. Returns (None, None) if a position isn't in the tables.
+        """
+        if not self.covers(board):
+            return None, None
+
+        best, bestKey, bestWdl = None, None, None
+        for move in board.legal_moves:
+            zeroing = board.is_zeroing(move)
+            board.push(move)
+            if board.is_checkmate():
+                board.pop()
+                return move, 2
+            wdl, dtz = self.probe_wdl(board), self.probe_dtz(board)
+            board.pop()
+            if wdl is None or dtz is None:
+                return None, None
+
+            # The opponent's WDL/DTZ after the move: lower is better for us
+            if wdl < 0:
+                # Winning: zeroing moves first, then the shortest distance
+                key = (wdl, 0 if zeroing else 1, -dtz)
+            elif wdl > 0:
+                # Losing: make the opponent's win as long as possible
+                key = (wdl, 0, -dtz)
+            else:
+                key = (0, 0, 0)
+            if bestKey is None or key < bestKey:
+                best, bestKey, bestWdl = move, key, -wdl
+        return best, bestWdl
+
+    def stats(self):
+        return {
+            'probes': self.probes,
+            'cache_hits': self.cache_hits,
+            'failures': self.failures,
+            'cached': len(self._wdl) + len(self._dtz),
+            'max_pieces': self.max_pieces,
+        }
+
+    def close(self):
+        self.tables.close()
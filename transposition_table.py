@@ -0,0 +1,115 @@
+import chess.polyglot
+
+# Bound types stored with each entry
+EXACT = 0
+LOWER = 1  # score is a lower bound (search failed high)
+UPPER = 2  # score is an upper bound (search failed low)
+
+
+def position_key(board):
+    """Zobrist key of a position (same hashing as Polyglot opening books)"""
+    if isinstance(board, chess.Board):
+        return chess.polyglot.zobrist_hash(board)
+    # The engine's Position keeps its key up to date move by move
+    return board.key
+
+
+class TranspositionTable:
+    """Fixed-size transposition table keyed on Zobrist hashes.
+
+    The table is split into buckets of two slots. The first slot keeps the
+    deepest search seen for that bucket (depth-preferred), the second slot is
+    always overwritten by the latest store (always-replace). Entries are plain
+    tuples: (key, depth, score, bound, best_move).
+    """
+
+    def __init__(self, max_entries=1 << 18):
+        if max_entries < 2:
+            raise ValueError("Transposition table needs room for at least 2 entries")
+        self.max_entries = max_entries
+        self.num_buckets = max_entries // 2
+        self.slots = [None] * (self.num_buckets * 2)
+        self.used = 0
+        self.reset_stats()
+
+    def reset_stats(self):
+        """Reset the probe counters (the stored entries are kept)"""
+        self.hits = 0
+        self.misses = 0
+        self.collisions = 0
+        self.stores = 0
+
+    def clear(self):
+        """Remove all entries and reset the counters"""
+        self.slots = [None] * (self.num_buckets * 2)
+        self.used = 0
+        self.reset_stats()
+
+    def probe(self, key):
+        """Return the entry stored for key, or None.
+
+        A miss where the bucket holds other positions is counted as a collision.
+        """
+        index = (key % self.num_buckets) * 2
+        deep = self.slots[index]
+        if deep is not None and deep[0] == key:
+            self.hits += 1
+            return deep
+        recent = self.slots[index + 1]
+        if recent is not None and recent[0] == key:
+            self.hits += 1
+            return recent
+
+        self.misses += 1
+        if deep is not None or recent is not None:
+            self.collisions += 1
+        return None
+
+    def peek(self, key):
+        """Like probe(), but without touching the counters"""
+        index = (key % self.num_buckets) * 2
+        for entry in (self.slots[index], self.slots[index + 1]):
+            if entry is not None and entry[0] == key:
+                return entry
+        return None
+
+    def store(self, key, depth, score, bound, best_move):
+        """Store a search result, using the depth-preferred/always-replace scheme"""
+        index = (key % self.num_buckets) * 2
+        entry = (key, depth, score, bound, best_move)
+        self.stores += 1
+
+        deep = self.slots[index]
+        if deep is None or deep[0] == key or depth >= deep[1]:
+            if deep is None:
+                self.used += 1
+            elif deep[0] != key:
+                # Keep the displaced deep entry around in the always-replace slot
+                self._replace_recent(index + 1, deep)
+            self.slots[index] = entry
+            # Drop a stale copy of the same position from the second slot
+            recent = self.slots[index + 1]
+            if recent is not None and recent[0] == key:
+                self.slots[index + 1] = None
+                self.used -= 1
+        else:
+            self._replace_recent(index + 1, entry)
+
+    def _replace_recent(self, index, entry):
+        if self.slots[index] is None:
+            self.used += 1
+        self.slots[index] = entry
+
+    def stats(self):
+        """Counters collected since the last reset_stats()"""
+        probes = self.hits + self.misses
+        return {
+            'probes': probes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'collisions': self.collisions,
+            'stores': self.stores,
+            'hit_rate': self.hits / probes if probes else 0.0,
+            'entries': self.used,
+            'max_entries': self.max_entries,
+        }
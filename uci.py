@@ -0,0 +1,259 @@
+"""Headless UCI front end for the engine.
+
+Reads UCI commands on stdin and answers on stdout, so the engine can be run
+by chess GUIs, match runners (cutechess-cli, fastchess) or a scheduler of
+our own without Tk:
+
+    python uci.py --book book.bin --syzygy syzygy
+
+Supported: uci, isready, ucinewgame, position [startpos | fen <FEN>]
+[moves ...], go [depth N] [movetime MS] [wtime/btime/winc/binc/movestogo]
+[infinite] [ponder], ponderhit, stop and quit. Searches run on an
+EngineWorker thread, so stop interrupts a running search right away and
+the engine answers with the best move of its deepest completed iteration.
+"""
+import argparse
+import queue
+import sys
+import threading
+
+import chess as ch
+
+from ChessEngine import Engine, MAX_DEPTH, mateIn
+from engine_worker import EngineWorker
+
+ENGINE_NAME = "ChessEngine"
+ENGINE_AUTHOR = "CHESS contributors"
+
+# Share of the remaining clock spent on a move when the GUI doesn't say how
+# many moves are left until the next time control
+DEFAULT_MOVES_TO_GO = 30
+# Kept back from the clock for the engine's overshoot and the GUI's latency (ms)
+MOVE_OVERHEAD = 50
+
+
+def parse_position(tokens):
+    """Board of a "position" command's arguments (startpos | fen <FEN>) [moves ...]"""
+    if "moves" in tokens:
+        index = tokens.index("moves")
+        tokens, moves = tokens[:index], tokens[index + 1:]
+    else:
+        moves = []
+    if tokens and tokens[0] == "fen":
+        board = ch.Board(" ".join(tokens[1:]))
+    else:
+        board = ch.Board()
+    for uci in moves:
+        board.push_uci(uci)
+    return board
+
+
+def parse_go(tokens):
+    """Arguments of a "go" command as a dict: numbers for the limits, True for the flags"""
+    args = {}
+    index = 0
+    while index < len(tokens):
+        name = tokens[index]
+        if name in ("infinite", "ponder"):
+            args[name] = True
+            index += 1
+        elif name == "searchmoves":
+            break  # not supported, and the rest of the line are moves
+        else:
+            if index + 1 < len(tokens):
+                try:
+                    args[name] = int(tokens[index + 1])
+                except ValueError:
+                    pass
+            index += 2
+    return args
+
+
+def time_budget(args, turn):
+    """Thinking time in milliseconds for the limits of a go command, or None for no clock"""
+    if "movetime" in args:
+        return max(1, args["movetime"] - MOVE_OVERHEAD)
+    remaining = args.get("wtime" if turn == ch.WHITE else "btime")
+    if remaining is None:
+        return None
+    increment = args.get("winc" if turn == ch.WHITE else "binc", 0)
+    budget = remaining // args.get("movestogo", DEFAULT_MOVES_TO_GO) + increment * 3 // 4
+    return max(1, min(budget, remaining - MOVE_OVERHEAD))
+
+
+def format_score(score):
+    """UCI score of an engine-relative score: centipawns, or mate in moves"""
+    moves = mateIn(score)
+    if moves is not None:
+        return f"mate {moves}"
+    return f"cp {score or 0}"
+
+
+class UciEngine:
+    """The UCI command loop around one Engine and its EngineWorker.
+
+    The reader (run()) only parses commands and hands searches to the
+    worker; a reporter thread prints the info lines of finished iterations
+    and the bestmove, so stop and quit are handled while a search runs.
+    """
+
+    def __init__(self, engine, output=sys.stdout):
+        self.engine = engine
+        self.worker = EngineWorker(engine)
+        self.output = output
+        self.board = ch.Board()
+        self.search_board = None
+        self.job_id = None
+        # "go ponder" and "go infinite" must not answer before ponderhit/stop:
+        # a move found earlier waits in _held
+        self._hold = False
+        self._held = None
+        self._lock = threading.Lock()
+        self._print_lock = threading.Lock()
+        self._idle = threading.Event()
+        self._idle.set()
+        self._reporter = threading.Thread(target=self._report, name="uci-reporter", daemon=True)
+        self._reporter.start()
+
+    def send(self, line):
+        with self._print_lock:
+            self.output.write(line + "\n")
+            self.output.flush()
+
+    def run(self, input=sys.stdin):
+        for line in input:
+            if not self.handle(line):
+                break
+        self.quit()
+
+    def handle(self, line):
+        """Execute one command line; False once the engine should exit"""
+        tokens = line.split()
+        if not tokens:
+            return True
+        command, args = tokens[0], tokens[1:]
+
+        if command == "uci":
+            self.send(f"id name {ENGINE_NAME}")
+            self.send(f"id author {ENGINE_AUTHOR}")
+            self.send("option name Ponder type check default false")
+            self.send("uciok")
+        elif command == "isready":
+            self.send("readyok")
+        elif command == "ucinewgame":
+            self.wait()
+            self.engine.newGame()
+            self.board = ch.Board()
+        elif command == "position":
+            self.board = parse_position(args)
+        elif command == "go":
+            self.go(parse_go(args))
+        elif command == "stop":
+            self.stop()
+        elif command == "ponderhit":
+            if self.job_id is not None:
+                self.worker.ponderhit(self.job_id)
+                self._release()
+        elif command == "quit":
+            return False
+        # Anything else (setoption, debug, register...) is ignored, as UCI asks
+        return True
+
+    def go(self, args):
+        # A new search only starts once the previous one has reported its move
+        self.wait()
+        board = self.search_board = self.board
+        self.engine.color = board.turn
+        self.engine.maxDepth = min(args.get("depth", MAX_DEPTH), MAX_DEPTH)
+        timeLimit = None if args.get("infinite") else time_budget(args, board.turn)
+        ponder = bool(args.get("ponder"))
+        self._hold = ponder or bool(args.get("infinite"))
+        self._idle.clear()
+        self.job_id = self.worker.submit(board, ponder=ponder, timeLimit=timeLimit)
+
+    def stop(self):
+        """Interrupt the running search; its bestmove is still sent"""
+        if self.job_id is not None:
+            self.worker.stop(self.job_id)
+            self._release()
+
+    def _release(self):
+        """No more holding back the bestmove; send it if the search is already over"""
+        with self._lock:
+            self._hold = False
+            move, self._held = self._held, None
+        if move is not None:
+            self._finish(move[0])
+
+    def wait(self):
+        """Block until the running search (if any) has sent its bestmove"""
+        self._idle.wait()
+
+    def quit(self):
+        self.stop()
+        self.wait()
+        self.worker.shutdown()
+
+    def _report(self):
+        worker = self.worker
+        while True:
+            try:
+                job_id, move, error = worker.results.get(timeout=0.05)
+            except queue.Empty:
+                self._send_progress()
+                continue
+            self._send_progress()
+            if error is not None:
+                self.send(f"info string search failed: {error!r}")
+            with self._lock:
+                if self._hold:
+                    self._held = (move,)
+                    continue
+            self._finish(move)
+
+    def _finish(self, move):
+        self._send_bestmove(move)
+        self.job_id = None
+        self._idle.set()
+
+    def _send_progress(self):
+        while True:
+            try:
+                _, info = self.worker.progress.get_nowait()
+            except queue.Empty:
+                return
+            milliseconds = int(info['time'] * 1000)
+            pv = " ".join(move.uci() for move in info['pv'])
+            self.send(f"info depth {info['depth']} seldepth {info['selDepth']} "
+                      f"score {format_score(info['score'])} nodes {info['nodes']} "
+                      f"nps {info['nps']} time {milliseconds} pv {pv}")
+
+    def _send_bestmove(self, move):
+        if not isinstance(move, ch.Move):
+            # Stopped before the first iteration finished, or nothing to play
+            move = next(iter(self.search_board.legal_moves), None)
+            self.send(f"bestmove {move.uci() if move else '0000'}")
+            return
+        ponder = self.engine.ponderMove() if move == self.engine.rootBestMove else None
+        self.send(f"bestmove {move.uci()}" + (f" ponder {ponder.uci()}" if ponder else ""))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the chess engine as a UCI engine on stdin/stdout")
+    parser.add_argument("--book", metavar="FILE", help="Polyglot opening book")
+    parser.add_argument("--syzygy", metavar="DIR", help="Syzygy tablebase directory")
+    parser.add_argument("--workers", type=int, default=1, help="search processes (default 1)")
+    parser.add_argument("--hash", type=int, default=1 << 18,
+                        help="transposition table size in positions (default 262144)")
+    args = parser.parse_args()
+
+    engine = Engine(ch.Board(), MAX_DEPTH, ch.WHITE, ttSize=args.hash, workers=args.workers,
+                    bookPath=args.book, tablebasePath=args.syzygy)
+    try:
+        UciEngine(engine).run()
+    finally:
+        engine.close()
+
+
+if __name__ == "__main__":
+    main()